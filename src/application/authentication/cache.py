@@ -0,0 +1,126 @@
+"""
+This module includes the cache of authenticated users.
+
+Entries are keyed by the token subject and the token expiration time,
+so the user is fetched from the database once per token instead of
+once per request. The local LRU cache is used by default and the Redis
+cache can be shared between workers if the url is configured.
+"""
+
+import json
+import time
+from typing import Protocol
+
+from cachetools import TTLCache
+
+from src.domain.users import UserFlat
+from src.infrastructure.application import create_redis, metrics, settings
+
+__all__ = (
+    "users_cache",
+    "cache_requests",
+    "LocalUsersCache",
+    "RedisUsersCache",
+)
+
+# Lookups of the users cache and the verified tokens cache
+cache_requests = metrics.counter(
+    "auth_cache_requests_total",
+    "Lookups of authentication caches by the result",
+    labels=("cache", "result"),
+)
+
+
+def _dump(user: UserFlat) -> str:
+    return user.model_dump_json(exclude={"password"})
+
+
+def _load(raw: str | bytes) -> UserFlat:
+    return UserFlat.model_validate({**json.loads(raw), "password": ""})
+
+
+class _UsersCache(Protocol):
+    async def get(self, sub: str, exp: int) -> UserFlat | None:
+        ...
+
+    async def set(self, sub: str, exp: int, user: UserFlat) -> None:
+        ...
+
+    async def invalidate(self, sub: str) -> None:
+        ...
+
+
+class LocalUsersCache:
+    """The in-process cache with the TTL and LRU eviction."""
+
+    def __init__(self, maxsize: int, ttl: int) -> None:
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, sub: str, exp: int) -> UserFlat | None:
+        return self._cache.get((sub, exp))
+
+    async def set(self, sub: str, exp: int, user: UserFlat) -> None:
+        self._cache[(sub, exp)] = user
+
+    async def invalidate(self, sub: str) -> None:
+        for key in [key for key in self._cache.keys() if key[0] == sub]:
+            self._cache.pop(key, None)
+
+
+class RedisUsersCache:
+    """The cache that is shared between all workers.
+    Entries are keyed by the generation of the user as well, so the
+    invalidation bumps the generation instead of scanning for the keys
+    of all tokens. Entries of old generations just expire by the TTL.
+    """
+
+    _PREFIX = "principal"
+
+    def __init__(self, url: str, ttl: int) -> None:
+        self._redis = create_redis(url)
+        self._ttl: int = ttl
+
+    def _generation_key(self, sub: str) -> str:
+        return f"{self._PREFIX}:{sub}:v"
+
+    async def _key(self, sub: str, exp: int) -> str:
+        generation = await self._redis.get(self._generation_key(sub))
+
+        return f"{self._PREFIX}:{sub}:{int(generation or 0)}:{exp}"
+
+    async def _touch_generation(self, sub: str) -> None:
+        # NOTE: The generation outlives entries of all its generations,
+        #       so it never starts over while any of them is alive
+        await self._redis.expire(self._generation_key(sub), 2 * self._ttl)
+
+    async def get(self, sub: str, exp: int) -> UserFlat | None:
+        if (raw := await self._redis.get(await self._key(sub, exp))) is None:
+            return None
+
+        return _load(raw)
+
+    async def set(self, sub: str, exp: int, user: UserFlat) -> None:
+        # NOTE: The entry is useless once the token is expired
+        ttl = min(self._ttl, int(exp - time.time()))
+
+        if ttl > 0:
+            await self._redis.set(
+                await self._key(sub, exp), _dump(user), ex=ttl
+            )
+            await self._touch_generation(sub)
+
+    async def invalidate(self, sub: str) -> None:
+        await self._redis.incr(self._generation_key(sub))
+        await self._touch_generation(sub)
+
+
+def _create_users_cache() -> _UsersCache:
+    config = settings.authentication.cache
+
+    if config.redis_url:
+        return RedisUsersCache(url=config.redis_url, ttl=config.ttl)
+
+    return LocalUsersCache(maxsize=config.maxsize, ttl=config.ttl)
+
+
+users_cache: _UsersCache = _create_users_cache()
@@ -1,10 +1,13 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from typing import Any, Callable
 
+import structlog
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from jose import jwt
 from passlib.context import CryptContext
-from pydantic import ValidationError
 
 from src.domain.authentication import (
     AuthenticationRepository,
@@ -15,6 +18,11 @@ from src.domain.users import UserFlat, UserRepository
 from src.infrastructure.application import AuthenticationError, settings
 from src.infrastructure.database import transaction
 
+from .cache import cache_requests, users_cache
+from .tokens import access_tokens
+
+logger = structlog.stdlib.get_logger()
+
 __all__ = (
     "authenticate_user",
     "create_payload",
@@ -26,34 +34,82 @@ __all__ = (
     "get_current_user",
     "hash_password",
     "verify_password",
+    "invalidate_user",
 )
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.authentication.password.rounds,
+)
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl="/auth/token",
     scheme_name=settings.authentication.scheme,
 )
 
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+# NOTE: bcrypt releases the GIL, so threads are enough to keep
+#       the event loop responsive while passwords are hashed.
+_hashing_executor = ThreadPoolExecutor(
+    max_workers=settings.authentication.password.workers,
+    thread_name_prefix="password-hashing",
+)
+_hashing_slots = asyncio.Semaphore(
+    settings.authentication.password.max_pending
+)
+
+
+async def _run_hashing(func: Callable[..., Any], *args: Any) -> Any:
+    """Run the CPU-bound hashing function in the dedicated executor.
+    The number of pending calls is bounded to apply the backpressure.
+    """
+
+    async with _hashing_slots:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hashing_executor, func, *args)
 
 
-def verify_password(password: str, hashed_password: str) -> bool:
+async def hash_password(password: str) -> str:
+    return await _run_hashing(pwd_context.hash, password)
+
+
+async def verify_password(
+    password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """Verify the password and return the new hash if the existed one
+    should be updated (e.g. bcrypt rounds were changed).
+    """
+
     try:
-        return pwd_context.verify(password, hashed_password)
-    except:
-        return False
+        return await _run_hashing(
+            pwd_context.verify_and_update, password, hashed_password
+        )
+    except (ValueError, TypeError):
+        return False, None
 
 
 async def authenticate_user(username: str, password: str):
     async with transaction():
         user = await AuthenticationRepository().get_user(username=username)
-        if not user:
-            return False
-        if not verify_password(password, user.password):
-            return False
-        return user
+
+    if not user:
+        return False
+
+    # NOTE: The password is verified outside of the transaction,
+    #       so the connection is not held while the hash is computed
+    verified, new_hash = await verify_password(password, user.password)
+    if not verified:
+        return False
+
+    if new_hash is not None:
+        async with transaction():
+            await AuthenticationRepository().update_password(
+                user.id, new_hash
+            )
+
+        await invalidate_user(user.id)
+
+    return user
 
 
 async def create_payload(user: UserFlat) -> dict:
@@ -99,19 +155,18 @@ def get_token_type():
 
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserFlat:
     try:
-        payload = jwt.decode(
-            token,
-            settings.authentication.access_token.secret_key,
-            algorithms=[settings.authentication.algorithm],
+        token_payload: TokenPayload = access_tokens.verify(token)
+    except AuthenticationError as err:
+        logger.info(
+            "Token verification failed", error=repr(err.__cause__ or err)
         )
-        print(payload)
-        token_payload = TokenPayload(**payload)
+        raise
+
+    if user := await users_cache.get(token_payload.sub, token_payload.exp):
+        cache_requests.inc(cache="users", result="hit")
+        return user
 
-        if datetime.fromtimestamp(token_payload.exp) < datetime.now():
-            raise AuthenticationError
-    except (JWTError, ValidationError) as err:
-        print(err)
-        raise AuthenticationError from err
+    cache_requests.inc(cache="users", result="miss")
 
     async with transaction():
         user = await UserRepository().get(id=token_payload.sub)
@@ -123,4 +178,18 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserFlat:
             )
     # TODO: Check if the token is in the blacklist
 
+    # NOTE: Request handlers never need the password hash,
+    #       so it is neither cached nor returned
+    user = user.model_copy(update={"password": ""})
+    await users_cache.set(token_payload.sub, token_payload.exp, user)
+
     return user
+
+
+async def invalidate_user(user_id: int) -> None:
+    """Drop the cached user, so the next request fetches it again.
+    Should be called once the user is updated or blocked and the
+    transaction is committed.
+    """
+
+    await users_cache.invalidate(str(user_id))
@@ -0,0 +1,116 @@
+"""
+This module includes the verification of access tokens.
+
+Verified tokens are cached by their digest until they are expired,
+so the signature is checked once per token instead of once per request.
+The JWT library is hidden behind the backend interface, so it can be
+switched by the configuration.
+"""
+
+import hashlib
+import time
+from typing import Protocol
+
+from cachetools import TLRUCache
+from jose import JWTError, jwk, jwt
+from pydantic import ValidationError
+
+from src.domain.authentication import TokenPayload
+from src.infrastructure.application import AuthenticationError, settings
+
+from .cache import cache_requests
+
+__all__ = ("TokenVerifier", "access_tokens")
+
+
+class _JWTBackend(Protocol):
+    def decode(self, token: str) -> dict:
+        """Verify the signature and return claims.
+        The AuthenticationError is raised if the token is invalid.
+        """
+
+
+class JoseBackend:
+    """The python-jose backend that reuses the prepared key object
+    instead of constructing it on each call.
+    """
+
+    def __init__(self, secret_key: str, algorithm: str) -> None:
+        self._key = jwk.construct(secret_key, algorithm)
+        self._algorithm = algorithm
+
+    def decode(self, token: str) -> dict:
+        try:
+            return jwt.decode(token, self._key, algorithms=[self._algorithm])
+        except JWTError as err:
+            raise AuthenticationError from err
+
+
+class PyJWTBackend:
+    """The PyJWT backend. The package is an optional dependency."""
+
+    def __init__(self, secret_key: str, algorithm: str) -> None:
+        import jwt as pyjwt
+
+        self._jwt = pyjwt.PyJWT()
+        self._error = pyjwt.InvalidTokenError
+        self._secret_key = secret_key
+        self._algorithm = algorithm
+
+    def decode(self, token: str) -> dict:
+        try:
+            return self._jwt.decode(
+                token, self._secret_key, algorithms=[self._algorithm]
+            )
+        except self._error as err:
+            raise AuthenticationError from err
+
+
+_BACKENDS: dict[str, type] = {
+    "jose": JoseBackend,
+    "pyjwt": PyJWTBackend,
+}
+
+
+def _until_expired(_, payload: TokenPayload, __) -> float:
+    return payload.exp
+
+
+class TokenVerifier:
+    """Verify tokens and cache the payload until the token is expired."""
+
+    def __init__(self, backend: _JWTBackend, maxsize: int) -> None:
+        self._backend = backend
+        self._cache: TLRUCache = TLRUCache(
+            maxsize=maxsize, ttu=_until_expired, timer=time.time
+        )
+
+    def verify(self, token: str) -> TokenPayload:
+        digest: bytes = hashlib.sha256(token.encode()).digest()
+
+        if (payload := self._cache.get(digest)) is not None:
+            cache_requests.inc(cache="tokens", result="hit")
+            return payload
+
+        cache_requests.inc(cache="tokens", result="miss")
+
+        try:
+            payload = TokenPayload(**self._backend.decode(token))
+        except ValidationError as err:
+            raise AuthenticationError from err
+
+        if payload.exp < time.time():
+            raise AuthenticationError
+
+        self._cache[digest] = payload
+
+        return payload
+
+
+access_tokens = TokenVerifier(
+    backend=_BACKENDS[settings.authentication.jwt_backend](
+        settings.authentication.access_token.secret_key,
+        settings.authentication.algorithm,
+    ),
+    maxsize=settings.authentication.verification_cache_size,
+)
@@ -0,0 +1,93 @@
+"""
+This module includes the read cache of the products catalog.
+
+Each change of the catalog bumps its version. Cached pages are keyed
+by the version, so the stale ones are never returned and just evicted
+by LRU. The version is also used as the ETag of the catalog pages.
+
+If the Redis url is configured, the version is shared between workers.
+Otherwise other workers do not see the change, so the local version is
+also bumped once the TTL is elapsed and pages are cached for the TTL.
+Hence pages and ETags of other workers are stale for the TTL at most.
+"""
+
+import time
+from typing import Any, Hashable
+
+from cachetools import TTLCache
+
+from src.infrastructure.application import create_redis, settings
+
+__all__ = ("catalog",)
+
+
+class _LocalVersion:
+    def __init__(self, ttl: float) -> None:
+        # NOTE: The version does not start from zero, so the ETag
+        #       of the previous process run is not reused
+        self._value: int = time.time_ns()
+        self._ttl: float = ttl
+        self._bumped_at: float = time.monotonic()
+
+    async def get(self) -> int:
+        if time.monotonic() - self._bumped_at >= self._ttl:
+            await self.bump()
+
+        return self._value
+
+    async def bump(self) -> None:
+        self._value += 1
+        self._bumped_at = time.monotonic()
+
+
+class _RedisVersion:
+    _KEY = "catalog:products:version"
+
+    def __init__(self, url: str) -> None:
+        self._redis = create_redis(url)
+
+    async def get(self) -> int:
+        if (value := await self._redis.get(self._KEY)) is None:
+            await self._redis.set(self._KEY, time.time_ns(), nx=True)
+            value = await self._redis.get(self._KEY)
+
+        return int(value)
+
+    async def bump(self) -> None:
+        await self._redis.incr(self._KEY)
+
+
+class CatalogCache:
+    """Cache the results of catalog reads until the catalog is changed."""
+
+    def __init__(
+        self, maxsize: int, ttl: float, redis_url: str | None = None
+    ) -> None:
+        self._version = (
+            _RedisVersion(redis_url) if redis_url else _LocalVersion(ttl)
+        )
+        self._pages: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def version(self) -> int:
+        return await self._version.get()
+
+    async def etag(self, *key: Hashable) -> str:
+        suffix = "-".join(str(part) for part in key if part is not None)
+
+        return f'"{await self.version()}-{suffix}"'
+
+    async def get(self, version: int, key: Hashable) -> Any | None:
+        return self._pages.get((version, key))
+
+    async def set(self, version: int, key: Hashable, value: Any) -> None:
+        self._pages[(version, key)] = value
+
+    async def invalidate(self) -> None:
+        await self._version.bump()
+
+
+catalog = CatalogCache(
+    maxsize=settings.catalog_cache.maxsize,
+    ttl=settings.catalog_cache.ttl,
+    redis_url=settings.catalog_cache.redis_url,
+)
@@ -1,3 +1,5 @@
+from typing import AsyncGenerator, Collection
+
 from src.domain.orders import (
     Order,
     OrderFlat,
@@ -5,7 +7,7 @@ from src.domain.orders import (
     OrderUncommited,
 )
 from src.domain.users import UserFlat
-from src.infrastructure.database import transaction
+from src.infrastructure.database import CountMode, transaction
 
 
 async def get_all() -> list[OrderFlat]:
@@ -18,18 +20,91 @@ async def get_all() -> list[OrderFlat]:
     return orders
 
 
+async def stream_all() -> AsyncGenerator[OrderFlat, None]:
+    """Stream all orders from the database one by one.
+    The transaction stays open while the generator is consumed.
+    """
+
+    async with transaction():
+        async for instance in OrdersRepository().all():
+            yield instance
+
+
+async def get_page(
+    cursor: str | None = None, limit: int = 100
+) -> tuple[list[OrderFlat], str | None]:
+    """Get the page of orders that follows the cursor."""
+
+    async with transaction():
+        return await OrdersRepository().page(cursor=cursor, limit=limit)
+
+
+async def get_user_page(
+    user_id: int, cursor: str | None = None, limit: int = 100
+) -> tuple[list[OrderFlat], str | None]:
+    """Get the page of orders of the user."""
+
+    async with transaction():
+        return await OrdersRepository().for_user(
+            user_id, cursor=cursor, limit=limit
+        )
+
+
+async def get_product_page(
+    product_id: int, cursor: str | None = None, limit: int = 100
+) -> tuple[list[OrderFlat], str | None]:
+    """Get the page of orders of the product."""
+
+    async with transaction():
+        return await OrdersRepository().for_product(
+            product_id, cursor=cursor, limit=limit
+        )
+
+
+async def get_page_aggregates(
+    cursor: str | None = None,
+    limit: int = 100,
+    include: Collection[str] = ("product", "user"),
+) -> tuple[list[Order], str | None]:
+    """Get the page of orders with the requested related data."""
+
+    async with transaction():
+        repository = OrdersRepository()
+        _orders, next_cursor = await repository.page(
+            cursor=cursor, limit=limit
+        )
+
+        return await repository.aggregates(_orders, include), next_cursor
+
+
+async def count(mode: CountMode = CountMode.EXACT) -> int:
+    """Count all orders in the database."""
+
+    async with transaction():
+        return await OrdersRepository().count(mode)
+
+
 async def create(payload: dict, user: UserFlat) -> Order:
     """Create a new order from huge json, does not matter..."""
 
     payload.update(user_id=user.id)
 
     async with transaction():
-        repository = OrdersRepository()
-        order_flat: OrderFlat = await repository.create(
-            OrderUncommited(**payload)
+        rich_order: Order = await OrdersRepository().create_aggregate(
+            OrderUncommited(**payload), user=user
         )
-        rich_order: Order = await repository.get(order_flat.id)
 
     # Do som other stuff...
 
     return rich_order
+
+
+async def create_many(payloads: list[dict], user: UserFlat) -> list[OrderFlat]:
+    """Create all orders of the user at once."""
+
+    schemas = [
+        OrderUncommited(**payload, user_id=user.id) for payload in payloads
+    ]
+
+    async with transaction():
+        return await OrdersRepository().create_many(schemas)
@@ -1,9 +1,13 @@
+from typing import AsyncGenerator
+
 from src.domain.products import (
     ProductFlat,
     ProductRepository,
     ProductUncommited,
 )
-from src.infrastructure.database import transaction
+from src.infrastructure.database import CountMode, transaction
+
+from .catalog import catalog
 
 
 async def get_all() -> list[ProductFlat]:
@@ -13,8 +17,70 @@ async def get_all() -> list[ProductFlat]:
         return [product async for product in ProductRepository().all()]
 
 
+async def stream_all() -> AsyncGenerator[ProductFlat, None]:
+    """Stream all products from the database one by one.
+    The transaction stays open while the generator is consumed.
+    """
+
+    async with transaction():
+        async for instance in ProductRepository().all():
+            yield instance
+
+
+async def get_page(
+    cursor: str | None = None, limit: int = 100
+) -> tuple[list[ProductFlat], str | None]:
+    """Get the page of products that follows the cursor.
+    The page is cached until the catalog is changed.
+    """
+
+    version = await catalog.version()
+
+    if (page := await catalog.get(version, key=(cursor, limit))) is not None:
+        return page
+
+    async with transaction():
+        page = await ProductRepository().page(cursor=cursor, limit=limit)
+
+    await catalog.set(version, key=(cursor, limit), value=page)
+
+    return page
+
+
+async def get_page_etag(
+    cursor: str | None = None,
+    limit: int = 100,
+    count: CountMode | None = None,
+) -> str:
+    """Get the ETag of the page that is changed with the catalog."""
+
+    return await catalog.etag(limit, cursor, count and count.value)
+
+
+async def count(mode: CountMode = CountMode.EXACT) -> int:
+    """Count all products in the database."""
+
+    async with transaction():
+        return await ProductRepository().count(mode)
+
+
 async def create(schema: ProductUncommited) -> ProductFlat:
     """Create a database record for the product."""
 
     async with transaction():
-        return await ProductRepository().create(schema)
+        product = await ProductRepository().create(schema)
+
+    await catalog.invalidate()
+
+    return product
+
+
+async def create_many(schemas: list[ProductUncommited]) -> list[ProductFlat]:
+    """Create database records for all products at once."""
+
+    async with transaction():
+        _products = await ProductRepository().create_many(schemas)
+
+    await catalog.invalidate()
+
+    return _products
@@ -1,5 +1,8 @@
+from typing import Any, AsyncGenerator
+
+from src.application.authentication import invalidate_user
 from src.domain.users import UserFlat, UserRepository, UserUncommited
-from src.infrastructure.database import transaction
+from src.infrastructure.database import CountMode, transaction
 
 
 async def get_all() -> list[UserFlat]:
@@ -9,6 +12,32 @@ async def get_all() -> list[UserFlat]:
         return [product async for product in UserRepository().all()]
 
 
+async def stream_all() -> AsyncGenerator[UserFlat, None]:
+    """Stream all users from the database one by one.
+    The transaction stays open while the generator is consumed.
+    """
+
+    async with transaction():
+        async for instance in UserRepository().all():
+            yield instance
+
+
+async def get_page(
+    cursor: str | None = None, limit: int = 100
+) -> tuple[list[UserFlat], str | None]:
+    """Get the page of users that follows the cursor."""
+
+    async with transaction():
+        return await UserRepository().page(cursor=cursor, limit=limit)
+
+
+async def count(mode: CountMode = CountMode.EXACT) -> int:
+    """Count all users in the database."""
+
+    async with transaction():
+        return await UserRepository().count(mode)
+
+
 async def create(schema: UserUncommited) -> UserFlat:
     """Create a database record for the user."""
 
@@ -16,6 +45,19 @@ async def create(schema: UserUncommited) -> UserFlat:
         return await UserRepository().create(schema)
 
 
+async def update(user_id: int, payload: dict[str, Any]) -> UserFlat:
+    """Update the user and drop it from the cache of authenticated users,
+    so the next request of the user reads the new data.
+    """
+
+    async with transaction():
+        user = await UserRepository().update(user_id, payload)
+
+    await invalidate_user(user_id)
+
+    return user
+
+
 async def get_exist(username: str) -> [UserFlat, None]:
     """Find exist user"""
 
@@ -13,5 +13,8 @@ class AuthenticationRepository(BaseRepository[UsersTable]):
         instance = await self._get_or_fail(key="username", value=username)
         return UserFlat.model_validate(instance)
 
+    async def update_password(self, id: int, password: str) -> None:
+        await self._update(key="id", value=id, payload={"password": password})
+
     async def create_payload(self, instance: UserFlat) -> dict:
         return {"sub": str(instance.id)}
@@ -9,7 +9,8 @@ __all__ = ("Order",)
 class Order(OrderFlat):
     """This data model aggregates information of an order
     and nested data models from other domains.
+    Related data models that were not requested are not loaded.
     """
 
-    product: ProductFlat
-    user: UserFlat
+    product: ProductFlat | None = None
+    user: UserFlat | None = None
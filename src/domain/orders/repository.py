@@ -1,10 +1,21 @@
-from typing import AsyncGenerator
+import asyncio
+from typing import AsyncGenerator, Awaitable, Collection
 
-from sqlalchemy import Result, select
+from sqlalchemy import Result, bindparam, insert, select
 from sqlalchemy.orm import joinedload
 
+from src.domain.products import ProductFlat
+from src.domain.users import UserFlat
 from src.infrastructure.application import NotFoundError
-from src.infrastructure.database import BaseRepository, OrdersTable
+from src.infrastructure.database import (
+    BaseRepository,
+    CountMode,
+    OrdersTable,
+    ProductsTable,
+    UsersTable,
+    get_loader,
+    statements,
+)
 
 from .aggregates import Order
 from .entities import OrderFlat, OrderUncommited
@@ -19,17 +30,95 @@ class OrdersRepository(BaseRepository[OrdersTable]):
         async for instance in self._all():
             yield OrderFlat.model_validate(instance)
 
-    async def get(self, id: int) -> Order:
-        query = (
-            select(OrdersTable)
-            .options(
-                joinedload(getattr(self.schema_class, "user")),
-                joinedload(getattr(self.schema_class, "product")),
+    async def page(
+        self, cursor: str | None = None, limit: int = 100
+    ) -> tuple[list[OrderFlat], str | None]:
+        instances, next_cursor = await self._get_page(
+            cursor=cursor, limit=limit
+        )
+        schemas = [
+            OrderFlat.model_validate(instance) for instance in instances
+        ]
+
+        return schemas, next_cursor
+
+    async def for_user(
+        self, user_id: int, cursor: str | None = None, limit: int = 100
+    ) -> tuple[list[OrderFlat], str | None]:
+        """The order history of the user.
+        The lookup is served by the (user_id, id) index.
+        """
+
+        instances, next_cursor = await self._get_page(
+            cursor=cursor, limit=limit, filters={"user_id": user_id}
+        )
+
+        return [OrderFlat.model_validate(i) for i in instances], next_cursor
+
+    async def for_product(
+        self, product_id: int, cursor: str | None = None, limit: int = 100
+    ) -> tuple[list[OrderFlat], str | None]:
+        """Orders of the product.
+        The lookup is served by the (product_id, id) index.
+        """
+
+        instances, next_cursor = await self._get_page(
+            cursor=cursor, limit=limit, filters={"product_id": product_id}
+        )
+
+        return [OrderFlat.model_validate(i) for i in instances], next_cursor
+
+    async def aggregates(
+        self,
+        orders: list[OrderFlat],
+        include: Collection[str] = ("product", "user"),
+    ) -> list[Order]:
+        """Build aggregates for many orders at once.
+        Only requested products and users are loaded by the batch
+        loaders, so there is one query per table instead of one per order.
+        """
+
+        loaders: dict[str, Awaitable[list]] = {}
+
+        if "product" in include:
+            loaders["product"] = get_loader(ProductsTable).load_many(
+                order.product_id for order in orders
+            )
+        if "user" in include:
+            loaders["user"] = get_loader(UsersTable).load_many(
+                order.user_id for order in orders
             )
-            .where(getattr(self.schema_class, "id") == id)
+
+        related = dict(zip(loaders, await asyncio.gather(*loaders.values())))
+        products = related.get("product") or [None] * len(orders)
+        users = related.get("user") or [None] * len(orders)
+
+        return [
+            Order(
+                **order.model_dump(),
+                product=product and ProductFlat.model_validate(product),
+                user=user and UserFlat.model_validate(user),
+            )
+            for order, product, user in zip(orders, products, users)
+        ]
+
+    async def count(self, mode: CountMode = CountMode.EXACT) -> int:
+        return await self._count(mode)
+
+    async def get(self, id: int) -> Order:
+        query = statements.get(
+            (self.schema_class, "get_aggregate"),
+            lambda: (
+                select(OrdersTable)
+                .options(
+                    joinedload(getattr(self.schema_class, "user")),
+                    joinedload(getattr(self.schema_class, "product")),
+                )
+                .where(getattr(self.schema_class, "id") == bindparam("id"))
+            ),
         )
 
-        result: Result = await self.execute(query)
+        result: Result = await self.execute(query, {"id": id})
 
         if not (instance := result.scalars().one_or_none()):
             raise NotFoundError
@@ -39,3 +128,37 @@ class OrdersRepository(BaseRepository[OrdersTable]):
     async def create(self, schema: OrderUncommited) -> OrderFlat:
         instance: OrdersTable = await self._save(schema.model_dump())
         return OrderFlat.model_validate(instance)
+
+    async def create_aggregate(
+        self, schema: OrderUncommited, user: UserFlat
+    ) -> Order:
+        """Create the order and return the aggregate without reloading it.
+        The user is already known by the caller, so only the product
+        is fetched before the insert statement.
+        The commit is up to the transaction that wraps this call.
+        """
+
+        product = await self._session.get(ProductsTable, schema.product_id)
+
+        if product is None:
+            raise NotFoundError(message="Product not found")
+
+        result: Result = await self.execute(
+            insert(self.schema_class).values(schema.model_dump())
+        )
+        self._invalidate_count()
+
+        return Order(
+            id=result.inserted_primary_key[0],
+            **schema.model_dump(),
+            product=ProductFlat.model_validate(product),
+            user=user,
+        )
+
+    async def create_many(
+        self, schemas: list[OrderUncommited]
+    ) -> list[OrderFlat]:
+        instances: list[OrdersTable] = await self._save_many(
+            [schema.model_dump() for schema in schemas]
+        )
+        return [OrderFlat.model_validate(instance) for instance in instances]
@@ -18,3 +18,4 @@ class ProductFlat(_ProductBase):
     """Database record representation."""
 
     id: int
+    version: int = 1
@@ -1,6 +1,10 @@
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator
 
-from src.infrastructure.database import BaseRepository, ProductsTable
+from src.infrastructure.database import (
+    BaseRepository,
+    CountMode,
+    ProductsTable,
+)
 
 from .entities import ProductFlat, ProductUncommited
 
@@ -9,11 +13,27 @@ __all__ = ("ProductRepository",)
 
 class ProductRepository(BaseRepository[ProductsTable]):
     schema_class = ProductsTable
+    version_column = "version"
 
     async def all(self) -> AsyncGenerator[ProductFlat, None]:
         async for instance in self._all():
             yield ProductFlat.model_validate(instance)
 
+    async def page(
+        self, cursor: str | None = None, limit: int = 100
+    ) -> tuple[list[ProductFlat], str | None]:
+        instances, next_cursor = await self._get_page(
+            cursor=cursor, limit=limit
+        )
+        schemas = [
+            ProductFlat.model_validate(instance) for instance in instances
+        ]
+
+        return schemas, next_cursor
+
+    async def count(self, mode: CountMode = CountMode.EXACT) -> int:
+        return await self._count(mode)
+
     async def get(self, id: int) -> ProductFlat:
         instance = await self._get_or_fail(key="id", value=id)
         return ProductFlat.model_validate(instance)
@@ -21,3 +41,25 @@ class ProductRepository(BaseRepository[ProductsTable]):
     async def create(self, schema: ProductUncommited) -> ProductFlat:
         instance: ProductsTable = await self._save(schema.model_dump())
         return ProductFlat.model_validate(instance)
+
+    async def create_many(
+        self, schemas: list[ProductUncommited]
+    ) -> list[ProductFlat]:
+        instances: list[ProductsTable] = await self._save_many(
+            [schema.model_dump() for schema in schemas]
+        )
+        return [ProductFlat.model_validate(instance) for instance in instances]
+
+    async def update(self, id: int, payload: dict[str, Any]) -> ProductFlat:
+        """Update the product.
+        If the version is passed, the product is updated only if it was
+        not changed by someone else since it was read.
+        """
+
+        instance = await self._update(key="id", value=id, payload=payload)
+        return ProductFlat.model_validate(instance)
+
+    async def update_many(
+        self, items: list[tuple[int, dict[str, Any]]]
+    ) -> int:
+        return await self._update_many(key="id", items=items)
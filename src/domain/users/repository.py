@@ -1,6 +1,6 @@
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator
 
-from src.infrastructure.database import BaseRepository, UsersTable
+from src.infrastructure.database import BaseRepository, CountMode, UsersTable
 
 from .entities import UserFlat, UserUncommited
 
@@ -14,6 +14,19 @@ class UserRepository(BaseRepository[UsersTable]):
         async for instance in self._all():
             yield UserFlat.model_validate(instance)
 
+    async def page(
+        self, cursor: str | None = None, limit: int = 100
+    ) -> tuple[list[UserFlat], str | None]:
+        instances, next_cursor = await self._get_page(
+            cursor=cursor, limit=limit
+        )
+        schemas = [UserFlat.model_validate(instance) for instance in instances]
+
+        return schemas, next_cursor
+
+    async def count(self, mode: CountMode = CountMode.EXACT) -> int:
+        return await self._count(mode)
+
     async def get(self, id: int) -> UserFlat:
         instance = await self._get_or_fail(key="id", value=id)
         return UserFlat.model_validate(instance)
@@ -25,3 +38,7 @@ class UserRepository(BaseRepository[UsersTable]):
     async def create(self, schema: UserUncommited) -> UserFlat:
         instance: UsersTable = await self._save(schema.model_dump())
         return UserFlat.model_validate(instance)
+
+    async def update(self, id: int, payload: dict[str, Any]) -> UserFlat:
+        instance = await self._update(key="id", value=id, payload=payload)
+        return UserFlat.model_validate(instance)
@@ -1,7 +1,14 @@
+from .caching import *  # noqa: F401, F403
 from .config import *  # noqa: F401, F403
 from .entities import *  # noqa: F401, F403
 from .errors import *  # noqa: F401, F403
 from .factory import *  # noqa: F401, F403
+from .idempotency import *  # noqa: F401, F403
 from .logging import *  # noqa: F401, F403
+from .metrics import *  # noqa: F401, F403
+from .redis_client import *  # noqa: F401, F403
+from .serialization import *  # noqa: F401, F403
+from .streaming import *  # noqa: F401, F403
+from .tasks import *  # noqa: F401, F403
 
 # from .middlewares import *  # noqa: F401, F403
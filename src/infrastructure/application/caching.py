@@ -0,0 +1,28 @@
+"""
+This module includes tools for the HTTP conditional requests.
+"""
+
+from fastapi import Request, status
+from fastapi.responses import Response
+
+__all__ = ("etag_matches", "not_modified")
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check the If-None-Match header of the request.
+    Weak validators are compared as strong ones since
+    the representation depends only on the ETag.
+    """
+
+    if not (header := request.headers.get("if-none-match")):
+        return False
+
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+    return "*" in tags or etag in tags
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+    )
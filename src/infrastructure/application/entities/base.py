@@ -54,6 +54,7 @@ class PublicEntity(BaseModel):
         json_encoders=_json_encoders,
         loc_by_alias=True,
         alias_generator=to_camelcase,
+        populate_by_name=True,
     )
 
     def flat_dict(self, by_alias=True):
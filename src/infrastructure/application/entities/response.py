@@ -15,9 +15,14 @@ __all__ = (
 
 
 class ResponseMulti(PublicEntity, Generic[_PublicEntity]):
-    """Generic response model that consist multiple results."""
+    """Generic response model that consist multiple results.
+    The next_cursor is used to fetch the next page if it exists.
+    The total is the number of all results if it was requested.
+    """
 
     result: list[_PublicEntity]
+    next_cursor: str | None = None
+    total: int | None = None
 
 
 class Response(PublicEntity, Generic[_PublicEntity]):
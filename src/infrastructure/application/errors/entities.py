@@ -12,6 +12,7 @@ __all__ = (
     "BadRequestError",
     "UnprocessableError",
     "NotFoundError",
+    "ConflictError",
     "AuthenticationError",
     "AuthorizationError",
     "DatabaseError",
@@ -67,6 +68,15 @@ class NotFoundError(BaseError):
         )
 
 
+class ConflictError(BaseError):
+    """Consider cases when the resource was changed by someone else
+    and the operation can not be applied to the current state.
+    """
+
+    def __init__(self, *_: tuple[Any], message: str = "Conflict") -> None:
+        super().__init__(message=message, status_code=status.HTTP_409_CONFLICT)
+
+
 class AuthenticationError(BaseError):
     def __init__(
         self, *_: tuple[Any], message: str = "Authentication error"
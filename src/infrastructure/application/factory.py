@@ -1,28 +1,43 @@
 import asyncio
-from functools import partial
-from typing import Callable, Coroutine, Iterable
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, Callable, Coroutine, Iterable
 
+import structlog
 from fastapi import APIRouter, FastAPI
 from fastapi.exceptions import RequestValidationError
+from fastapi.responses import PlainTextResponse
 from pydantic import ValidationError
+from starlette.types import ASGIApp
 
 from . import processes
+from .config import settings
 from .errors import (
     BaseError,
     custom_base_errors_handler,
     pydantic_validation_errors_handler,
     python_base_error_handler,
 )
-from .middlewares import LogMiddleware
+from .metrics import metrics
+from .middlewares import LogMiddleware, MetricsMiddleware
+from .tasks import background_tasks
+
+logger = structlog.stdlib.get_logger()
 
 __all__ = ("create",)
 
 
+async def _metrics() -> PlainTextResponse:
+    # NOTE: Metrics are collected on the loop that updates them,
+    #       while snapshots of workers are read in the thread
+    content = await asyncio.to_thread(metrics.render, metrics.collect())
+
+    return PlainTextResponse(content, media_type="text/plain; version=0.0.4")
+
+
 def create(
     *_,
     rest_routers: Iterable[APIRouter],
-    # middlewares: Iterable[tuple[Type[BaseHTTPMiddleware], dict[str, Any]]]
-    # | None = None,
+    middlewares: Iterable[Callable[..., ASGIApp]] | None = None,
     startup_tasks: Iterable[Callable[[], Coroutine]] | None = None,
     shutdown_tasks: Iterable[Callable[[], Coroutine]] | None = None,
     startup_processes: Iterable[processes._ProcessBlock] | None = None,
@@ -31,15 +46,63 @@ def create(
     """The application factory using FastAPI framework.
     🎉 Only passing routes is mandatory to start.
     """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+        # Define startup processes. They are supervised until the shutdown.
+        for callback, namespace, key, *options in startup_processes or ():
+            processes.run(
+                namespace=namespace,
+                key=key,
+                callback=callback,
+                **(options[0] if options else {}),
+            )
+
+        processes.start_supervisor()
+
+        # Metrics of the worker are shared with others if it is configured
+        app.state.background_tasks.spawn(
+            metrics.flush_forever, wait=False, bounded=False
+        )
+
+        # Startup tasks are running in the background until they are done
+        # or the application is shut down
+        for task in startup_tasks or ():
+            app.state.background_tasks.spawn(task)
+
+        yield
+
+        for task in shutdown_tasks or ():
+            try:
+                await task()
+            except Exception:
+                logger.exception(f"The shutdown task {task} is failed")
+
+        await app.state.background_tasks.drain(
+            timeout=settings.background_tasks.shutdown_timeout
+        )
+        await processes.shutdown()
+
     # Initialize the base FastAPI application
-    app = FastAPI(**kwargs)
+    app = FastAPI(lifespan=lifespan, **kwargs)
+
+    # The group of background tasks is available for the application
+    # code to spawn cache warmers, refreshers, etc.
+    app.state.background_tasks = background_tasks
 
     app.add_middleware(LogMiddleware)
+    app.add_middleware(MetricsMiddleware)
+
+    # Extend with the application specific middlewares
+    for middleware in middlewares or ():
+        app.add_middleware(middleware)
 
     # Include REST API routers
     for router in rest_routers:
         app.include_router(router)
 
+    app.add_api_route(settings.metrics.path, _metrics, include_in_schema=False)
+
     # Extend FastAPI default error handlers
     app.exception_handler(RequestValidationError)(
         pydantic_validation_errors_handler
@@ -48,20 +111,4 @@ def create(
     app.exception_handler(ValidationError)(pydantic_validation_errors_handler)
     app.exception_handler(Exception)(python_base_error_handler)
 
-    # Define startup tasks that are running asynchronous using FastAPI hook
-    if startup_tasks:
-        for task in startup_tasks:
-            coro = partial(asyncio.create_task, task())
-            app.on_event("startup")(coro)
-
-    # Define shutdown tasks using FastAPI hook
-    if shutdown_tasks:
-        for task in shutdown_tasks:
-            app.on_event("shutdown")(task)
-
-    # Define startup processes
-    if startup_processes:
-        for callback, namespace, key in startup_processes:
-            processes.run(namespace=namespace, key=key, callback=callback)
-
     return app
@@ -0,0 +1,234 @@
+"""
+This module includes tools for handling the Idempotency-Key header.
+
+The response to the request with the key is stored for a while and
+replayed to the retries of the same request instead of performing it
+once again. Concurrent duplicates are not racing with each other: they
+wait for the request that is in flight and get its response.
+The key is claimed in the store before performing the request, so the
+duplicate that reaches another worker gets the conflict instead.
+Responses are stored in the process memory by default and could be
+shared between workers if the Redis url is configured.
+"""
+
+import asyncio
+import uuid
+from typing import Awaitable, Callable, Protocol
+
+from cachetools import TTLCache
+
+from .config import settings
+from .errors import ConflictError, UnprocessableError
+from .redis_client import create_redis
+
+__all__ = (
+    "idempotency",
+    "Idempotency",
+    "LocalIdempotencyStore",
+    "RedisIdempotencyStore",
+)
+
+
+# The stored fingerprint and the response. The response is None while
+# the request is still performed by someone.
+_Stored = tuple[str, bytes | None]
+
+
+class _IdempotencyStore(Protocol):
+    async def claim(self, key: str, fingerprint: str) -> _Stored | None:
+        """Claim the key for the request atomically.
+        None is returned if the key is claimed by the caller,
+        otherwise it returns what is stored for the key.
+        """
+
+    async def set(self, key: str, fingerprint: str, content: bytes) -> None:
+        ...
+
+    async def release(self, key: str) -> None:
+        """Drop the claim if the request is failed, so it can be retried."""
+
+
+class LocalIdempotencyStore:
+    """The in-process storage with the TTL and LRU eviction."""
+
+    def __init__(self, maxsize: int, ttl: int) -> None:
+        self._responses: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def claim(self, key: str, fingerprint: str) -> _Stored | None:
+        if (stored := self._responses.get(key)) is not None:
+            return stored
+
+        self._responses[key] = (fingerprint, None)
+
+        return None
+
+    async def set(self, key: str, fingerprint: str, content: bytes) -> None:
+        self._responses[key] = (fingerprint, content)
+
+    async def release(self, key: str) -> None:
+        if (stored := self._responses.get(key)) and stored[1] is None:
+            self._responses.pop(key, None)
+
+
+class RedisIdempotencyStore:
+    """The storage that is shared between all workers.
+    The key is claimed by the pending marker that is set only if the key
+    does not exist, so exactly one worker performs the request and
+    others see either the marker or the response.
+    """
+
+    _PREFIX = "idempotency"
+    _PENDING = b"P"
+    _RESPONSE = b"R"
+
+    # Delete the claim only if it is still owned by this worker
+    _RELEASE = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then "
+        "return redis.call('del', KEYS[1]) end return 0"
+    )
+
+    def __init__(self, url: str, ttl: int, lock_ttl: int) -> None:
+        self._redis = create_redis(url)
+        self._ttl: int = ttl
+        self._lock_ttl: int = lock_ttl
+        self._claims: dict[str, bytes] = {}
+
+    def _key(self, key: str) -> str:
+        return f"{self._PREFIX}:{key}"
+
+    async def claim(self, key: str, fingerprint: str) -> _Stored | None:
+        marker = b"%s%s\n%s" % (
+            self._PENDING,
+            fingerprint.encode(),
+            uuid.uuid4().hex.encode(),
+        )
+
+        # NOTE: The marker expires by itself if the worker is gone
+        while not await self._redis.set(
+            self._key(key), marker, nx=True, ex=self._lock_ttl
+        ):
+            # NOTE: The key might expire between both calls
+            if (raw := await self._redis.get(self._key(key))) is not None:
+                kind, fingerprint, content = raw[:1], *raw[1:].split(
+                    b"\n", 1
+                )
+
+                return fingerprint.decode(), (
+                    content if kind == self._RESPONSE else None
+                )
+
+        self._claims[key] = marker
+
+        return None
+
+    async def set(self, key: str, fingerprint: str, content: bytes) -> None:
+        self._claims.pop(key, None)
+        await self._redis.set(
+            self._key(key),
+            self._RESPONSE + fingerprint.encode() + b"\n" + content,
+            ex=self._ttl,
+        )
+
+    async def release(self, key: str) -> None:
+        if (marker := self._claims.pop(key, None)) is not None:
+            await self._redis.eval(self._RELEASE, 1, self._key(key), marker)
+
+
+class Idempotency:
+    """Perform the operation once per key and replay its result."""
+
+    def __init__(self, store: _IdempotencyStore) -> None:
+        self._store: _IdempotencyStore = store
+        self._in_flight: dict[str, tuple[str, asyncio.Future]] = {}
+
+    async def perform(
+        self,
+        key: str,
+        fingerprint: str,
+        operation: Callable[[], Awaitable[bytes]],
+    ) -> tuple[bytes, bool]:
+        """Return the rendered response and whether it is replayed.
+        The fingerprint identifies the payload of the request,
+        so the key can not be reused for another one.
+
+        Duplicates within the worker wait for the request in flight.
+        Duplicates of the request that is performed by another worker
+        get the ConflictError, so the client retries them later.
+        """
+
+        while (flight := self._in_flight.get(key)) is not None:
+            _check_fingerprint(flight[0], fingerprint)
+
+            try:
+                return await asyncio.shield(flight[1]), True
+            except asyncio.CancelledError:
+                # NOTE: If the request in flight was cancelled,
+                #       the operation is performed by one of waiters
+                if not flight[1].cancelled():
+                    raise
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = (fingerprint, future)
+
+        try:
+            content = await self._perform(key, fingerprint, operation)
+        except Exception as error:
+            future.set_exception(error)
+            # NOTE: Mark the exception as retrieved if nobody waits for it
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            future.set_result(content[0])
+            return content
+        finally:
+            self._in_flight.pop(key, None)
+
+    async def _perform(
+        self,
+        key: str,
+        fingerprint: str,
+        operation: Callable[[], Awaitable[bytes]],
+    ) -> tuple[bytes, bool]:
+        if (stored := await self._store.claim(key, fingerprint)) is not None:
+            _check_fingerprint(stored[0], fingerprint)
+
+            if stored[1] is None:
+                raise ConflictError(
+                    message="The request with this key is already in progress"
+                )
+
+            return stored[1], True
+
+        try:
+            content: bytes = await operation()
+        except BaseException:
+            await self._store.release(key)
+            raise
+
+        await self._store.set(key, fingerprint, content)
+
+        return content, False
+
+
+def _check_fingerprint(expected: str, fingerprint: str) -> None:
+    if expected != fingerprint:
+        raise UnprocessableError(
+            message="The idempotency key is reused for another request"
+        )
+
+
+def _create_store() -> _IdempotencyStore:
+    config = settings.idempotency
+
+    if config.redis_url:
+        return RedisIdempotencyStore(
+            url=config.redis_url, ttl=config.ttl, lock_ttl=config.lock_ttl
+        )
+
+    return LocalIdempotencyStore(maxsize=config.maxsize, ttl=config.ttl)
+
+
+idempotency = Idempotency(store=_create_store())
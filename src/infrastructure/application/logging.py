@@ -1,13 +1,56 @@
 """logging helpers"""
 
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 
 import structlog
 
+from .config import settings
+
+try:
+    import rapidjson as _json
+except ImportError:  # pragma: no cover
+    import json as _json
+
 __all__ = ("configure_logger",)
 
 
-def configure_logger(enable_json_logs: bool = False):
+class _CallsiteParameterAdder(structlog.processors.CallsiteParameterAdder):
+    """Collect callsite parameters only for records of the given level
+    or higher since the frame inspection is expensive.
+    """
+
+    def __init__(
+        self, level: str, additional_ignores: list[str] | None = None, **kwargs
+    ) -> None:
+        # NOTE: Frames of this module are skipped as well, otherwise
+        #       the `__call__` below is reported as the callsite
+        super().__init__(
+            additional_ignores=[__name__, *(additional_ignores or [])],
+            **kwargs,
+        )
+        self._level: int = logging.getLevelName(level.upper())
+
+    def __call__(self, logger, method_name, event_dict):
+        level = logging.getLevelName(event_dict.get("level", "").upper())
+
+        if isinstance(level, int) and level >= self._level:
+            return super().__call__(logger, method_name, event_dict)
+
+        return event_dict
+
+
+def configure_logger(enable_json_logs: bool | None = None):
+    """Configure structlog and the standard logging.
+    Log calls only build the event on the calling thread while
+    rendering and writing are performed by the background listener.
+    """
+
+    if enable_json_logs is None:
+        enable_json_logs = settings.logging.json_logs
+
     shared_processors = [
         structlog.stdlib.add_log_level,
         structlog.stdlib.add_logger_name,
@@ -16,37 +59,38 @@ def configure_logger(enable_json_logs: bool = False):
         structlog.processors.StackInfoRenderer(),
         structlog.processors.dict_tracebacks,
         structlog.processors.TimeStamper(fmt="iso", utc=False),
-        structlog.processors.CallsiteParameterAdder(
-            {
+        _CallsiteParameterAdder(
+            level=settings.logging.callsite_level,
+            parameters={
                 structlog.processors.CallsiteParameter.PATHNAME,
                 structlog.processors.CallsiteParameter.FILENAME,
                 structlog.processors.CallsiteParameter.MODULE,
                 structlog.processors.CallsiteParameter.FUNC_NAME,
+                structlog.processors.CallsiteParameter.LINENO,
                 structlog.processors.CallsiteParameter.THREAD,
                 structlog.processors.CallsiteParameter.THREAD_NAME,
                 structlog.processors.CallsiteParameter.PROCESS,
                 structlog.processors.CallsiteParameter.PROCESS_NAME,
-            }
+            },
         ),
         structlog.stdlib.ExtraAdder(),
     ]
 
     structlog.configure(
         processors=(
-            shared_processors
+            [structlog.stdlib.filter_by_level]
+            + shared_processors
             + [structlog.stdlib.ProcessorFormatter.wrap_for_formatter]
         ),
         logger_factory=structlog.stdlib.LoggerFactory(),
-        # call log with await syntax in thread pool executor
-        wrapper_class=structlog.stdlib.AsyncBoundLogger,
-        # wrapper_class=structlog.make_filtering_bound_logger(
-        #     getattr(logging, log_level, logging.WARNING)
-        # ),
+        # NOTE: The regular logger is used since records are passed
+        #       to the queue without blocking the event loop
+        wrapper_class=structlog.stdlib.BoundLogger,
         cache_logger_on_first_use=True,
     )
 
     logs_render = (
-        structlog.processors.JSONRenderer()
+        structlog.processors.JSONRenderer(serializer=_json.dumps)
         if enable_json_logs
         else structlog.dev.ConsoleRenderer(colors=True)
     )
@@ -54,6 +98,16 @@ def configure_logger(enable_json_logs: bool = False):
     _configure_default_logging_by_custom(shared_processors, logs_render)
 
 
+class _QueueHandler(QueueHandler):
+    """Put records into the queue as they are.
+    The default handler formats the message in the calling thread and
+    it breaks records that are wrapped by structlog for the formatter.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
 def _configure_default_logging_by_custom(shared_processors, logs_render):
     handler = logging.StreamHandler()
 
@@ -68,8 +122,16 @@ def _configure_default_logging_by_custom(shared_processors, logs_render):
     )
 
     handler.setFormatter(formatter)
+
+    # NOTE: Records are rendered and written by the listener thread,
+    #       so logging calls do not block the event loop.
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    listener = QueueListener(records, handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
     root_uvicorn_logger = logging.getLogger()
-    root_uvicorn_logger.addHandler(handler)
+    root_uvicorn_logger.addHandler(_QueueHandler(records))
     root_uvicorn_logger.setLevel(logging.INFO)
 
 
@@ -0,0 +1,415 @@
+"""
+This module includes metrics of the application that are exposed
+in the Prometheus text format.
+
+Metrics are updated only from the event loop, so plain counters are
+enough and no locks are taken on the request path. Values that are
+owned by other components (e.g. the connection pool) are read by
+collectors on scrape.
+
+If the multiprocess directory is configured, each worker dumps its
+metrics to the file there from time to time and the scrape merges
+files of all workers. Files of workers that are gone are folded into
+the aggregate file without gauges, so their counters and histograms
+are still summed and files do not pile up. Files are named by the pid
+and the start time of the worker, so the new worker that reuses the pid
+does not look like the old one with counters reset.
+"""
+
+import asyncio
+import bisect
+import fcntl
+import json
+import math
+import os
+from pathlib import Path
+from typing import Callable, Iterable, NamedTuple
+
+from .config import settings
+
+__all__ = (
+    "metrics",
+    "MetricsRegistry",
+    "MetricFamily",
+    "Counter",
+    "Gauge",
+    "Histogram",
+)
+
+
+_Labels = tuple[tuple[str, str], ...]
+
+
+class MetricFamily(NamedTuple):
+    """The snapshot of the metric with all its samples.
+    Each sample is the name suffix, labels and the value.
+    Values of workers are merged by `sum` or `max`.
+    """
+
+    name: str
+    kind: str
+    description: str
+    samples: list[tuple[str, _Labels, float]]
+    merge: str = "sum"
+
+
+class _Metric:
+    kind: str = ""
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: Iterable[str] = (),
+        merge: str = "sum",
+    ) -> None:
+        self.name: str = name
+        self.description: str = description
+        self.labels: tuple[str, ...] = tuple(labels)
+        self.merge: str = merge
+
+    def _key(self, labels: dict[str, str]) -> _Labels:
+        return tuple((name, str(labels[name])) for name in self.labels)
+
+    def _samples(self) -> list[tuple[str, _Labels, float]]:
+        raise NotImplementedError
+
+    def collect(self) -> MetricFamily:
+        return MetricFamily(
+            self.name,
+            self.kind,
+            self.description,
+            self._samples(),
+            self.merge,
+        )
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: dict[_Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self) -> list[tuple[str, _Labels, float]]:
+        return [("", key, value) for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, *args, buckets: Iterable[float] = (), **kwargs
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.buckets: list[float] = sorted(buckets)
+
+        # Counts of each bucket (not cumulative), the sum and the count
+        self._values: dict[_Labels, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+
+        if (state := self._values.get(key)) is None:
+            state = self._values[key] = (
+                [0] * (len(self.buckets) + 1),
+                [0.0, 0.0],
+            )
+
+        counts, total = state
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        total[0] += value
+        total[1] += 1
+
+    def _samples(self) -> list[tuple[str, _Labels, float]]:
+        samples: list[tuple[str, _Labels, float]] = []
+
+        for key, (counts, (total, count)) in self._values.items():
+            cumulative = 0
+
+            for bound, bucket in zip([*self.buckets, math.inf], counts):
+                cumulative += bucket
+                le = "+Inf" if bound == math.inf else repr(float(bound))
+                samples.append(("_bucket", (*key, ("le", le)), cumulative))
+
+            samples.append(("_sum", key, total))
+            samples.append(("_count", key, count))
+
+        return samples
+
+
+_Collector = Callable[[], Iterable[MetricFamily]]
+
+
+class MetricsRegistry:
+    def __init__(self, multiprocess_dir: Path | None = None) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[_Collector] = []
+        self._multiprocess_dir: Path | None = multiprocess_dir
+
+    def _register(self, metric: _Metric) -> _Metric:
+        # NOTE: Metrics are shared by name, so the module that is
+        #       imported twice does not register duplicates
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, description: str, **kwargs) -> Counter:
+        return self._register(  # type: ignore
+            Counter(name, description, **kwargs)
+        )
+
+    def gauge(self, name: str, description: str, **kwargs) -> Gauge:
+        return self._register(  # type: ignore
+            Gauge(name, description, **kwargs)
+        )
+
+    def histogram(self, name: str, description: str, **kwargs) -> Histogram:
+        return self._register(  # type: ignore
+            Histogram(name, description, **kwargs)
+        )
+
+    def register_collector(self, collector: _Collector) -> None:
+        """Add the function that reads metrics on each scrape."""
+
+        self._collectors.append(collector)
+
+    def collect(self) -> list[MetricFamily]:
+        families = [metric.collect() for metric in self._metrics.values()]
+
+        for collector in self._collectors:
+            families.extend(collector())
+
+        return families
+
+    def render(self, families: list[MetricFamily] | None = None) -> str:
+        """Render metrics of this worker or of all workers.
+        Files are read and written in the multiprocess mode, so it should
+        be called in the thread with metrics collected on the event loop.
+        """
+
+        if families is None:
+            families = self.collect()
+
+        if self._multiprocess_dir is None:
+            return _render(families)
+
+        self._write(families)
+        _fold_dead_snapshots(self._multiprocess_dir)
+
+        return _render(_merge(_read_snapshots(self._multiprocess_dir)))
+
+    def write_snapshot(self) -> None:
+        self._write(self.collect())
+
+    def _write(self, families: list[MetricFamily]) -> None:
+        if self._multiprocess_dir is None:
+            return
+
+        pid = os.getpid()
+        _replace(
+            self._multiprocess_dir / f"{pid}-{_started_at(pid)}.json",
+            families,
+        )
+
+    async def flush_forever(self) -> None:
+        """Dump metrics of the worker periodically.
+        Used as the application startup task.
+        """
+
+        if self._multiprocess_dir is None:
+            return
+
+        self._multiprocess_dir.mkdir(parents=True, exist_ok=True)
+
+        while True:
+            # NOTE: Metrics are collected on the loop that updates them
+            #       and only the file is written in the thread
+            await asyncio.to_thread(self._write, self.collect())
+            await asyncio.sleep(settings.metrics.flush_interval)
+
+
+# Counters and histograms of workers that are gone
+_AGGREGATE = "aggregate.json"
+
+
+def _started_at(pid: int) -> int:
+    """Read the start time of the process in clock ticks.
+    Zero is returned if procfs is not available.
+    """
+
+    try:
+        with open(f"/proc/{pid}/stat") as file:
+            # NOTE: The command name might include spaces
+            return int(file.read().rsplit(")", 1)[1].split()[19])
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def _is_alive(path: Path) -> bool:
+    """Check whether the worker that writes the file is running."""
+
+    try:
+        pid, started_at = map(int, path.stem.split("-"))
+    except ValueError:
+        return False
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+
+    return _started_at(pid) == started_at
+
+
+def _replace(path: Path, families: list[MetricFamily]) -> None:
+    temporary = path.with_suffix(".tmp")
+    temporary.write_text(json.dumps(families))
+
+    # NOTE: The file is replaced atomically, so the scrape
+    #       of another worker never reads the partial file
+    os.replace(temporary, path)
+
+
+def _load(path: Path) -> list[MetricFamily]:
+    try:
+        snapshot = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return []
+
+    return [
+        MetricFamily(
+            name,
+            kind,
+            description,
+            [
+                (suffix, tuple(map(tuple, labels)), value)
+                for suffix, labels, value in samples
+            ],
+            merge,
+        )
+        for name, kind, description, samples, merge in snapshot
+    ]
+
+
+def _fold_dead_snapshots(directory: Path) -> None:
+    """Merge files of workers that are gone into the aggregate file
+    and delete them.
+    """
+
+    dead = [
+        path
+        for path in directory.glob("*.json")
+        if path.name != _AGGREGATE and not _is_alive(path)
+    ]
+
+    if not dead:
+        return
+
+    # NOTE: Workers scrape concurrently, so each dead file
+    #       must be folded only once
+    with open(directory / "aggregate.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+
+        aggregate = directory / _AGGREGATE
+        families = _load(aggregate)
+
+        for path in dead:
+            if path.exists():
+                families.extend(
+                    family
+                    for family in _load(path)
+                    if family.kind != "gauge"
+                )
+
+        _replace(aggregate, _merge(families))
+
+        for path in dead:
+            path.unlink(missing_ok=True)
+
+
+def _read_snapshots(directory: Path) -> list[MetricFamily]:
+    families: list[MetricFamily] = []
+
+    for path in directory.glob("*.json"):
+        alive = _is_alive(path)
+
+        families.extend(
+            family
+            for family in _load(path)
+            if alive or family.kind != "gauge"
+        )
+
+    return families
+
+
+def _merge(families: list[MetricFamily]) -> list[MetricFamily]:
+    merged: dict[str, MetricFamily] = {}
+    values: dict[str, dict[tuple[str, _Labels], float]] = {}
+
+    for family in families:
+        merged.setdefault(family.name, family._replace(samples=[]))
+        family_values = values.setdefault(family.name, {})
+
+        for suffix, labels, value in family.samples:
+            key = (suffix, labels)
+
+            if key not in family_values:
+                family_values[key] = value
+            elif family.merge == "max":
+                family_values[key] = max(family_values[key], value)
+            else:
+                family_values[key] += value
+
+    return [
+        family._replace(
+            samples=[
+                (suffix, labels, value)
+                for (suffix, labels), value in values[name].items()
+            ]
+        )
+        for name, family in merged.items()
+    ]
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    )
+
+
+def _render(families: Iterable[MetricFamily]) -> str:
+    lines: list[str] = []
+
+    for family in families:
+        lines.append(f"# HELP {family.name} {family.description}")
+        lines.append(f"# TYPE {family.name} {family.kind}")
+
+        for suffix, labels, value in family.samples:
+            sample = f"{family.name}{suffix}"
+
+            if labels:
+                sample += "{%s}" % ",".join(
+                    f'{name}="{_escape(label)}"' for name, label in labels
+                )
+
+            lines.append(f"{sample} {float(value)!r}")
+
+    return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry(multiprocess_dir=settings.metrics.multiprocess_dir)
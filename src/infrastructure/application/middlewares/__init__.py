@@ -1 +1,2 @@
+from .metrics import *  # noqa: F401, F403
 from .router_logging import *  # noqa: F401, F403
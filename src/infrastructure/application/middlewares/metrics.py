@@ -0,0 +1,79 @@
+import time
+
+from starlette.routing import BaseRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..config import settings
+from ..metrics import metrics
+
+__all__ = ("MetricsMiddleware",)
+
+
+_REQUESTS_IN_FLIGHT = metrics.gauge(
+    "http_requests_in_flight", "Requests that are being processed"
+)
+_REQUEST_DURATION = metrics.histogram(
+    "http_request_duration_seconds",
+    "Request processing time by the route",
+    labels=("method", "route", "status"),
+    buckets=settings.metrics.latency_buckets,
+)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware that collects the number of requests
+    in flight and the latency histogram of each route.
+
+    Routes are labeled by the path template instead of the actual path,
+    so the number of series does not depend on path parameters.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._templates: dict[object, str] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started: int = time.perf_counter_ns()
+        status_code: int = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+            await send(message)
+
+        _REQUESTS_IN_FLIGHT.inc()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _REQUESTS_IN_FLIGHT.dec()
+            _REQUEST_DURATION.observe(
+                (time.perf_counter_ns() - started) / 1e9,
+                method=scope["method"],
+                route=self._template(scope),
+                status=str(status_code),
+            )
+
+    def _template(self, scope: Scope) -> str:
+        # NOTE: The router puts the matched endpoint into the scope
+        if (endpoint := scope.get("endpoint")) is None:
+            return "<unmatched>"
+
+        if (template := self._templates.get(endpoint)) is None:
+            routes: list[BaseRoute] = getattr(scope.get("app"), "routes", [])
+            template = self._templates[endpoint] = next(
+                (
+                    getattr(route, "path", "<unknown>")
+                    for route in routes
+                    if getattr(route, "endpoint", None) is endpoint
+                ),
+                "<unknown>",
+            )
+
+        return template
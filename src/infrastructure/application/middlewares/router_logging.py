@@ -1,19 +1,69 @@
-import structlog
-from starlette.middleware.base import BaseHTTPMiddleware
+import logging
+import random
+import time
 
-logger = structlog.stdlib.get_logger()
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from ..config import settings
 
-class LogMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        response = await call_next(request)
-        await logger.info(
+__all__ = ("LogMiddleware",)
+
+# NOTE: The standard logger is used on purpose. Records are put into
+#       the queue and rendered in the separate thread by the listener,
+#       so the request is not waiting for the log to be written.
+logger = logging.getLogger("src.access")
+
+
+class LogMiddleware:
+    """Pure ASGI middleware that measures the request processing time,
+    sends it within the X-Process-Time header and logs the request.
+    Only the sampled part of successful requests is logged
+    while server errors are logged always.
+    """
+
+    def __init__(
+        self, app: ASGIApp, sample_rate: float = settings.logging.sample_rate
+    ) -> None:
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started: int = time.perf_counter_ns()
+        status_code: int = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                elapsed = (time.perf_counter_ns() - started) / 1e9
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Process-Time", f"{elapsed:.6f}")
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if status_code >= 500 or random.random() < self.sample_rate:
+                self._log(scope, status_code, started)
+
+    @staticmethod
+    def _log(scope: Scope, status_code: int, started: int) -> None:
+        path: str = scope["path"]
+
+        if query := scope.get("query_string"):
+            path = f"{path}?{query.decode('latin-1')}"
+
+        logger.info(
             "Incoming request",
             extra={
-                "req": {"method": request.method, "url": str(request.url)},
-                "res": {
-                    "status_code": response.status_code,
-                },
+                "req": {"method": scope["method"], "url": path},
+                "res": {"status_code": status_code},
+                "duration_ms": (time.perf_counter_ns() - started) / 1e6,
             },
         )
-        return response
@@ -2,29 +2,198 @@
 The main purpose of this module is implementing separate
 processes interaction interface.
 
+Each process is supervised: it sends heartbeats through the pipe and
+it is restarted according to its restart policy with the exponential
+backoff if it exits or stops sending heartbeats. Coroutines send them
+from their own event loop, so the hung coroutine is restarted as well,
+while regular callbacks send them from the thread and only the exit of
+such a process is detected.
+
+Coroutine jobs that do not need the separate interpreter could be run
+on the shared event loop in the background thread instead, so they do
+not cost the fork and the event loop each.
+
 Obviously once the Python3.12 works in production
 this one could be replaced with threading module instead.
 """
 
 import asyncio
-from multiprocessing import Process
+import enum
+import os
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection
 from typing import Any, Callable, Coroutine
 
 import structlog
 
+from .config import settings
+from .errors import ProcessError
+from .metrics import MetricFamily, metrics
+
 logger = structlog.stdlib.get_logger()
 
-from .errors import ProcessError
+__all__ = ("_ProcessBlock", "RestartPolicy")
+
+
+# The callback, the namespace, the key and optional keyword arguments
+# of the run() function, e.g. the restart policy
+_ProcessBlock = (
+    tuple[Callable, str, str] | tuple[Callable, str, str, dict[str, Any]]
+)
+
+
+class RestartPolicy(str, enum.Enum):
+    NEVER = "never"
+    ON_FAILURE = "on-failure"
+    ALWAYS = "always"
+
+    def should_restart(self, failed: bool) -> bool:
+        return self is RestartPolicy.ALWAYS or (
+            failed and self is RestartPolicy.ON_FAILURE
+        )
+
+
+class _ChildProcess:
+    """The supervised process with its restart state."""
+
+    def __init__(
+        self,
+        key: str,
+        callback: Callable,
+        kwargs: dict[str, Any],
+        restart: RestartPolicy,
+    ) -> None:
+        self.key: str = key
+        self.callback: Callable = callback
+        self.kwargs: dict[str, Any] = kwargs
+        self.restart: RestartPolicy = restart
+
+        self.process: Process | None = None
+        self.heartbeat: Connection | None = None
+        self.started_at: float = 0.0
+        self.last_heartbeat: float = 0.0
+        self.restart_at: float | None = None
+        self.terminated_at: float | None = None
+        self.killed: bool = False
+        self.restarts: int = 0
+        self.failures: int = 0
+        self.finished: bool = False
+
+    def start(self) -> None:
+        receiver, sender = Pipe(duplex=False)
+        self.process = Process(
+            target=_child_main,
+            args=(sender, self.callback, self.kwargs),
+            daemon=True,
+        )
+        self.process.start()
+
+        # NOTE: The sending end belongs to the child from now on
+        sender.close()
+
+        self.heartbeat = receiver
+        self.started_at = self.last_heartbeat = time.monotonic()
+        self.restart_at = self.terminated_at = None
+        self.killed = False
+
+    def receive_heartbeats(self) -> None:
+        if self.heartbeat is None:
+            return
+
+        try:
+            while self.heartbeat.poll():
+                self.heartbeat.recv_bytes()
+                self.last_heartbeat = time.monotonic()
+        except (EOFError, OSError):
+            # The child is gone, it is detected by the exit code
+            pass
+
+    def close(self) -> None:
+        if self.heartbeat is not None:
+            self.heartbeat.close()
+            self.heartbeat = None
+
+        if self.process is not None and self.process.exitcode is not None:
+            self.process.close()
+            self.process = None
+
+
+class _SharedLoopJob:
+    """The coroutine job that is run on the shared event loop."""
+
+    def __init__(self, key: str, restart: RestartPolicy) -> None:
+        self.key: str = key
+        self.restart: RestartPolicy = restart
+        self.future: Future | None = None
+        self.started_at: float = time.monotonic()
+        self.restarts: int = 0
+
+
+class _SharedLoop:
+    """The event loop that is running in the background thread."""
+
+    def __init__(self) -> None:
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def get(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name="shared-loop",
+                    daemon=True,
+                )
+                self._thread.start()
+
+            return self._loop
+
+    def stop(self, timeout: float) -> None:
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+
+        if loop is None or thread is None:
+            return
+
+        try:
+            asyncio.run_coroutine_threadsafe(_cancel_all(), loop).result(
+                timeout
+            )
+        except TimeoutError:
+            logger.warning("Jobs of the shared loop are not cancelled")
+
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
 
-__all__ = ("_ProcessBlock",)
+        if not thread.is_alive():
+            loop.close()
 
 
-_ProcessBlock = tuple[Callable, str, str]
+async def _cancel_all() -> None:
+    """Cancel all tasks of the running loop and wait for them."""
+
+    tasks = asyncio.all_tasks() - {asyncio.current_task()}
+
+    for task in tasks:
+        task.cancel()
+
+    await asyncio.gather(*tasks, return_exceptions=True)
 
 
 # NOTE: This place is definitely should be replaced
 #       with something more sophisticated.
-_PROCESSES: dict[str, Process] = {}
+_PROCESSES: dict[str, _ChildProcess] = {}
+_JOBS: dict[str, _SharedLoopJob] = {}
+_SHARED_LOOP = _SharedLoop()
+
+# The task of the supervisor that is running on the application loop
+_SUPERVISOR: asyncio.Task | None = None
 
 
 def _build_key(namespace: str, key: Any) -> str:
@@ -33,60 +202,418 @@ def _build_key(namespace: str, key: Any) -> str:
     return f"{namespace}_{str(key)}"
 
 
+def _backoff(failures: int) -> float:
+    config = settings.processes
+
+    return min(config.backoff_base * 2**failures, config.backoff_max)
+
+
+def _send_heartbeats(heartbeat: Connection, interval: float) -> None:
+    try:
+        while True:
+            heartbeat.send_bytes(b"")
+            time.sleep(interval)
+    except OSError:
+        # The supervisor is gone, so there is nobody to notify
+        pass
+
+
+async def _send_heartbeats_async(
+    heartbeat: Connection, interval: float
+) -> None:
+    try:
+        while True:
+            heartbeat.send_bytes(b"")
+            await asyncio.sleep(interval)
+    except OSError:
+        # The supervisor is gone, so there is nobody to notify
+        pass
+
+
+async def _run_with_heartbeats(
+    heartbeat: Connection,
+    callback: Callable[..., Coroutine],
+    kwargs: dict[str, Any],
+) -> None:
+    beats = asyncio.create_task(
+        _send_heartbeats_async(
+            heartbeat, settings.processes.heartbeat_interval
+        )
+    )
+
+    try:
+        await callback(**kwargs)
+    finally:
+        beats.cancel()
+
+
+def _child_main(
+    heartbeat: Connection, callback: Callable, kwargs: dict[str, Any]
+) -> None:
+    """The entrypoint of each child process.
+    If the callback is a coroutine, it will be run in a event loop.
+    """
+
+    if asyncio.iscoroutinefunction(callback):
+        asyncio.run(_run_with_heartbeats(heartbeat, callback, kwargs))
+        return
+
+    # NOTE: The regular callback can not be interrupted for heartbeats,
+    #       so they only prove that the process is alive
+    threading.Thread(
+        target=_send_heartbeats,
+        args=(heartbeat, settings.processes.heartbeat_interval),
+        daemon=True,
+    ).start()
+
+    callback(**kwargs)
+
+
 def get(namespace: str, key: Any) -> Process:
     """Get the process from the register if exist."""
 
     _key = _build_key(namespace, key)
     try:
-        return _PROCESSES[_key]
+        process = _PROCESSES[_key].process
     except KeyError as err:
         raise ProcessError(message=f"Process {_key} does not exist.") from err
 
+    if process is None:
+        raise ProcessError(message=f"Process {_key} is not running.")
 
-def kill(namespace: str, key: Any) -> None:
-    """Kill the process base on the namespace and key."""
+    return process
+
+
+async def kill(namespace: str, key: Any) -> None:
+    """Kill the process or the shared loop job base on the namespace
+    and key. It is not restarted afterwards.
+    """
 
-    process: Process = get(namespace, key)
-    process.terminate()
     _key = _build_key(namespace, key)
-    del _PROCESSES[_key]
-    logger.success(f"The process {_key} is terminated")
 
-    # NOTE: Only for threads
-    # raise NotImplementedError
+    if (job := _JOBS.pop(_key, None)) is not None:
+        if job.future is not None:
+            job.future.cancel()
+        logger.info(f"The job {_key} is cancelled")
+        return
 
+    if (child := _PROCESSES.pop(_key, None)) is None:
+        raise ProcessError(message=f"Process {_key} does not exist.")
 
-def _run_coro(coro_func: Callable[..., Coroutine], *args, **kwargs) -> None:
-    """Run the coroutine in the event loop.
-    Used as a helper function for the run function.
-    """
+    if child.process is not None and child.process.exitcode is None:
+        child.process.terminate()
+        await asyncio.to_thread(
+            child.process.join, settings.processes.shutdown_timeout
+        )
 
-    asyncio.run(coro_func(*args, **kwargs))
+    child.close()
+    logger.info(f"The process {_key} is terminated")
 
 
 def run(
     namespace: str,
     key: Any,
     callback: Callable | Callable[..., Coroutine],
+    restart: RestartPolicy = RestartPolicy.ON_FAILURE,
+    shared_loop: bool = False,
     **kwargs: Any,
-) -> Process:
+) -> Process | Future:
     """Run the process and register it for future management.
     If the callback is a coroutine, it will be run in a event loop.
+
+    Coroutine jobs with `shared_loop` are run on the event loop of the
+    background thread instead of the separate process.
     """
 
-    if (_key := _build_key(namespace, key)) in _PROCESSES:
+    _key = _build_key(namespace, key)
+
+    if _key in _PROCESSES or _key in _JOBS:
         raise ProcessError(message=f"Process {_key} already exist")
 
-    task: Process = (
-        Process(target=_run_coro, args=(callback,), kwargs=kwargs, daemon=True)
-        if asyncio.iscoroutinefunction(callback)
-        else Process(target=callback, kwargs=kwargs, daemon=True)
-    )
-    task.start()
+    if shared_loop:
+        if not asyncio.iscoroutinefunction(callback):
+            raise ProcessError(
+                message=f"Only coroutines run on the shared loop: {_key}"
+            )
 
-    _PROCESSES[_key] = task
+        job = _JOBS[_key] = _SharedLoopJob(key=_key, restart=restart)
+        job.future = asyncio.run_coroutine_threadsafe(
+            _run_job(job, callback, kwargs), _SHARED_LOOP.get()
+        )
+        logger.debug(f"Background job is running: {_key}")
+
+        return job.future
+
+    child = _PROCESSES[_key] = _ChildProcess(
+        key=_key, callback=callback, kwargs=kwargs, restart=restart
+    )
+    child.start()
 
     logger.debug(f"Background process is running: {_key}")
 
-    return task
-    return task
+    return child.process  # type: ignore[return-value]
+
+
+async def _run_job(
+    job: _SharedLoopJob,
+    callback: Callable[..., Coroutine],
+    kwargs: dict[str, Any],
+) -> None:
+    """Run the job on the shared loop and restart it by the policy."""
+
+    failures = 0
+
+    while True:
+        job.started_at = time.monotonic()
+
+        try:
+            await callback(**kwargs)
+        except Exception:
+            logger.exception(f"The job {job.key} is failed")
+            failed = True
+        else:
+            failed = False
+
+        if not job.restart.should_restart(failed):
+            return
+
+        uptime = time.monotonic() - job.started_at
+
+        if uptime >= settings.processes.backoff_max:
+            failures = 0
+
+        await asyncio.sleep(_backoff(failures))
+        failures += 1
+        job.restarts += 1
+
+
+def _check(child: _ChildProcess, now: float) -> None:
+    """Restart the child if it is gone or does not send heartbeats."""
+
+    if child.finished or child.process is None:
+        return
+
+    child.receive_heartbeats()
+
+    config = settings.processes
+
+    if (exitcode := child.process.exitcode) is None:
+        if child.terminated_at is None:
+            if now - child.last_heartbeat > config.heartbeat_timeout:
+                logger.warning(f"The process {child.key} is not responding")
+                child.process.terminate()
+                child.terminated_at = now
+        elif (
+            not child.killed
+            and now - child.terminated_at >= config.shutdown_timeout
+        ):
+            # NOTE: The child ignores SIGTERM or it is blocked in C code
+            logger.warning(f"The process {child.key} is killed")
+            child.process.kill()
+            child.killed = True
+        return
+
+    if child.restart_at is None:
+        failed = exitcode != 0
+
+        if not child.restart.should_restart(failed):
+            logger.info(f"The process {child.key} exited with {exitcode}")
+            child.finished = True
+            child.close()
+            return
+
+        if now - child.started_at >= config.backoff_max:
+            child.failures = 0
+
+        child.restart_at = now + _backoff(child.failures)
+        child.failures += 1
+        logger.warning(
+            f"The process {child.key} exited with {exitcode}. "
+            f"Restarting in {child.restart_at - now:.1f}s"
+        )
+    elif now >= child.restart_at:
+        child.close()
+        child.start()
+        child.restarts += 1
+
+
+async def supervise() -> None:
+    """Check children forever. Used as the application startup task."""
+
+    while True:
+        now = time.monotonic()
+
+        for child in list(_PROCESSES.values()):
+            try:
+                _check(child, now)
+            except Exception:
+                logger.exception(f"Supervising {child.key} is failed")
+
+        await asyncio.sleep(settings.processes.check_interval)
+
+
+def start_supervisor() -> None:
+    global _SUPERVISOR
+
+    if _SUPERVISOR is None or _SUPERVISOR.done():
+        _SUPERVISOR = asyncio.create_task(supervise())
+
+
+async def shutdown() -> None:
+    """Stop the supervisor, then ask all children and jobs to exit
+    and kill those of them that are still alive after the timeout.
+    """
+
+    global _SUPERVISOR
+
+    if _SUPERVISOR is not None:
+        _SUPERVISOR.cancel()
+        _SUPERVISOR = None
+
+    timeout: float = settings.processes.shutdown_timeout
+    deadline = time.monotonic() + timeout
+    children = list(_PROCESSES.values())
+    _PROCESSES.clear()
+
+    for child in children:
+        if child.process is not None and child.process.exitcode is None:
+            child.process.terminate()
+
+    for child in children:
+        if child.process is None:
+            continue
+
+        remaining = max(deadline - time.monotonic(), 0)
+        await asyncio.to_thread(child.process.join, remaining)
+
+        if child.process.exitcode is None:
+            logger.warning(f"The process {child.key} is killed")
+            child.process.kill()
+            await asyncio.to_thread(child.process.join)
+
+        child.close()
+
+    for job in _JOBS.values():
+        if job.future is not None:
+            job.future.cancel()
+
+    _JOBS.clear()
+    await asyncio.to_thread(_SHARED_LOOP.stop, timeout)
+
+
+_CLOCK_TICKS: int = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 1
+_PAGE_SIZE: int = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 1
+
+
+def _usage(pid: int | None) -> dict[str, float]:
+    """Read the CPU time and the resident memory of the process.
+    Nothing is returned if procfs is not available.
+    """
+
+    try:
+        with open(f"/proc/{pid}/stat") as file:
+            # NOTE: The command name might include spaces
+            fields = file.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/statm") as file:
+            rss_pages = int(file.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return {}
+
+    return {
+        "cpu_seconds": (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS,
+        "rss_bytes": rss_pages * _PAGE_SIZE,
+    }
+
+
+def stats() -> dict[str, dict[str, Any]]:
+    """Return the state and the resources usage of each child."""
+
+    now = time.monotonic()
+    result: dict[str, dict[str, Any]] = {}
+
+    for key, child in _PROCESSES.items():
+        alive = child.process is not None and child.process.exitcode is None
+        pid: int | None = child.process.pid if alive else None  # type: ignore
+        heartbeat_age = now - child.last_heartbeat
+        timeout = settings.processes.heartbeat_timeout
+
+        result[key] = {
+            "kind": "process",
+            "pid": pid,
+            "alive": alive,
+            "healthy": alive and heartbeat_age <= timeout,
+            "restarts": child.restarts,
+            "uptime_seconds": now - child.started_at if alive else 0.0,
+            "heartbeat_age_seconds": heartbeat_age,
+            **(_usage(pid) if alive else {}),
+        }
+
+    for key, job in _JOBS.items():
+        alive = job.future is not None and not job.future.done()
+
+        result[key] = {
+            "kind": "shared_loop",
+            "alive": alive,
+            "healthy": alive,
+            "restarts": job.restarts,
+            "uptime_seconds": now - job.started_at if alive else 0.0,
+        }
+
+    return result
+
+
+# The name, the type and the description of each field of stats
+_STATS_METRICS: dict[str, tuple[str, str, str]] = {
+    "alive": (
+        "background_process_up",
+        "gauge",
+        "Whether the background process or job is running",
+    ),
+    "healthy": (
+        "background_process_healthy",
+        "gauge",
+        "Whether the background process is running and sends heartbeats",
+    ),
+    "restarts": (
+        "background_process_restarts_total",
+        "counter",
+        "Restarts of the background process or job",
+    ),
+    "heartbeat_age_seconds": (
+        "background_process_heartbeat_age_seconds",
+        "gauge",
+        "Seconds since the last heartbeat of the background process",
+    ),
+    "cpu_seconds": (
+        "background_process_cpu_seconds_total",
+        "counter",
+        "CPU time of the background process",
+    ),
+    "rss_bytes": (
+        "background_process_resident_memory_bytes",
+        "gauge",
+        "Resident memory of the background process",
+    ),
+}
+
+
+def _collect_process_metrics() -> list[MetricFamily]:
+    # NOTE: Usage is read from procfs, so no disk is touched on scrape
+    children = stats()
+
+    return [
+        MetricFamily(
+            name,
+            kind,
+            description,
+            [
+                ("", (("process", key),), float(state[field]))
+                for key, state in children.items()
+                if field in state
+            ],
+        )
+        for field, (name, kind, description) in _STATS_METRICS.items()
+    ]
+
+
+metrics.register_collector(_collect_process_metrics)
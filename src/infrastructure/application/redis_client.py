@@ -0,0 +1,24 @@
+"""
+This module includes the Redis client that is shared by caches
+and stores of the application if the Redis url is configured.
+"""
+
+from functools import lru_cache
+from typing import Any
+
+__all__ = ("create_redis",)
+
+
+@lru_cache
+def create_redis(url: str) -> Any:
+    """Create the async Redis client.
+    Clients are cached by the url, so components that use the same
+    Redis server share the connection pool.
+    """
+
+    try:
+        from redis import asyncio as aioredis
+    except ImportError:
+        import aioredis
+
+    return aioredis.from_url(url)
@@ -0,0 +1,60 @@
+"""
+This module includes the fast path for serializing collections.
+
+Instead of validating each item into the public schema in Python,
+wrapping them in ResponseMulti and letting FastAPI validate the
+response model once again, the whole response is validated and dumped
+to JSON bytes by the cached pydantic TypeAdapter.
+"""
+
+from functools import lru_cache
+from typing import Any, Iterable, Type
+
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+from .entities import ResponseMulti, _PublicEntity
+
+__all__ = ("JSONBytesResponse", "response_multi")
+
+
+class JSONBytesResponse(Response):
+    """The response for the content that is already rendered to JSON."""
+
+    media_type = "application/json"
+
+    def render(self, content: bytes) -> bytes:
+        return content
+
+
+@lru_cache(maxsize=None)
+def _response_multi_adapter(schema: Type[_PublicEntity]) -> TypeAdapter:
+    return TypeAdapter(ResponseMulti[schema])  # type: ignore
+
+
+def response_multi(
+    schema: Type[_PublicEntity],
+    items: Iterable[Any],
+    next_cursor: str | None = None,
+    total: int | None = None,
+    exclude: set[str] | None = None,
+    **kwargs,
+) -> JSONBytesResponse:
+    """Render items of any kind (ORM rows, internal entities)
+    as the ResponseMulti of the public schema.
+    The excluded fields are omitted from each item.
+    """
+
+    adapter = _response_multi_adapter(schema)
+    response = adapter.validate_python(
+        {"result": items, "next_cursor": next_cursor, "total": total},
+        from_attributes=True,
+    )
+
+    content: bytes = adapter.dump_json(
+        response,
+        by_alias=True,
+        exclude={"result": {"__all__": exclude}} if exclude else None,
+    )
+
+    return JSONBytesResponse(content, **kwargs)
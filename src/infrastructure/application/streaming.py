@@ -0,0 +1,56 @@
+"""
+This module includes tools for streaming collections to the client
+as newline delimited JSON (NDJSON) instead of building the whole
+response in the memory.
+"""
+
+from typing import AsyncIterable, AsyncIterator, Type
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+from .entities import _PublicEntity
+
+__all__ = ("NDJSON_MEDIA_TYPE", "accepts_ndjson", "NDJSONResponse")
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# The number of serialized rows that are sent to the client at once
+_CHUNK_SIZE = 100
+
+
+def accepts_ndjson(request: Request) -> bool:
+    """Check if the client opted in the streaming mode."""
+
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+class NDJSONResponse(StreamingResponse):
+    """Serialize each item to the public schema while it is consumed
+    from the async iterable and send them to the client by chunks.
+    """
+
+    media_type = NDJSON_MEDIA_TYPE
+
+    def __init__(
+        self, items: AsyncIterable, schema: Type[_PublicEntity], **kwargs
+    ) -> None:
+        super().__init__(self._render(items, schema), **kwargs)
+
+    @staticmethod
+    async def _render(
+        items: AsyncIterable, schema: Type[_PublicEntity]
+    ) -> AsyncIterator[bytes]:
+        chunk: list[bytes] = []
+
+        async for item in items:
+            public = schema.model_validate(item)
+            chunk.append(public.model_dump_json(by_alias=True).encode())
+
+            if len(chunk) >= _CHUNK_SIZE:
+                yield b"\n".join(chunk) + b"\n"
+                chunk.clear()
+
+        if chunk:
+            yield b"\n".join(chunk) + b"\n"
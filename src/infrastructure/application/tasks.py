@@ -0,0 +1,124 @@
+"""
+This module includes the group of background tasks that are running
+on the application event loop, e.g. cache warmers and refreshers.
+
+Unlike asyncio.TaskGroup, the failure of one task does not cancel
+the others: it is logged and counted. The number of tasks that are
+running at the same time is bounded, and the group is drained on
+the application shutdown within the deadline.
+"""
+
+import asyncio
+from typing import Callable, Coroutine
+
+import structlog
+
+from .config import settings
+
+logger = structlog.stdlib.get_logger()
+
+__all__ = ("BackgroundTasks", "background_tasks")
+
+
+class BackgroundTasks:
+    """The group that owns all background tasks of the application."""
+
+    def __init__(self, max_concurrency: int) -> None:
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: set[asyncio.Task] = set()
+        self._nowait: set[asyncio.Task] = set()
+
+        self.started: int = 0
+        self.succeeded: int = 0
+        self.failed: int = 0
+        self.cancelled: int = 0
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def spawn(
+        self,
+        callback: Callable[[], Coroutine],
+        name: str | None = None,
+        wait: bool = True,
+        bounded: bool = True,
+    ) -> asyncio.Task:
+        """Run the coroutine function once the slot is free.
+        The coroutine is created only when the task is started.
+
+        Tasks that are running forever (e.g. refreshers) should not be
+        waited for on the shutdown, so they are cancelled right away.
+        They should not be bounded either, otherwise they hold the slot
+        forever and other tasks never start.
+        """
+
+        task = asyncio.create_task(
+            self._run(callback, bounded), name=name or callback.__qualname__
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._done)
+
+        if not wait:
+            self._nowait.add(task)
+
+        return task
+
+    async def _run(
+        self, callback: Callable[[], Coroutine], bounded: bool
+    ) -> None:
+        if not bounded:
+            self.started += 1
+            await callback()
+            return
+
+        async with self._semaphore:
+            self.started += 1
+            await callback()
+
+    def _done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        self._nowait.discard(task)
+
+        if task.cancelled():
+            self.cancelled += 1
+        elif (error := task.exception()) is not None:
+            self.failed += 1
+            logger.error(
+                f"The background task {task.get_name()} is failed",
+                exc_info=error,
+            )
+        else:
+            self.succeeded += 1
+
+    async def drain(self, timeout: float) -> None:
+        """Wait for running tasks and cancel the rest after the timeout."""
+
+        for task in self._nowait:
+            task.cancel()
+
+        if not self._tasks:
+            return
+
+        _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+
+        for task in pending:
+            logger.warning(f"The background task {task.get_name()} is hung")
+            task.cancel()
+
+        if pending:
+            await asyncio.wait(pending)
+
+    def metrics(self) -> dict[str, int]:
+        return {
+            "running": len(self._tasks),
+            "started": self.started,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+        }
+
+
+# The group of the application. It is drained on the shutdown.
+background_tasks = BackgroundTasks(
+    max_concurrency=settings.background_tasks.max_concurrency
+)
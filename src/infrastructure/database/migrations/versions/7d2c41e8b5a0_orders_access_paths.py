@@ -0,0 +1,46 @@
+"""orders access paths
+
+Revision ID: 7d2c41e8b5a0
+Revises: 3a9ab0fb15c6
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7d2c41e8b5a0"
+down_revision: Union[str, None] = "3a9ab0fb15c6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        op.f("ix_orders_user_id_id"),
+        "orders",
+        ["user_id", "id"],
+        unique=False,
+        postgresql_include=["amount", "product_id"],
+    )
+    op.create_index(
+        op.f("ix_orders_product_id_id"),
+        "orders",
+        ["product_id", "id"],
+        unique=False,
+        postgresql_include=["amount", "user_id"],
+    )
+
+
+def downgrade() -> None:
+    # NOTE: MySQL drops the implicit index of the foreign key once
+    #       the composite one covers it, so it is restored first
+    if op.get_bind().dialect.name in ("mysql", "mariadb"):
+        op.create_index("fk_orders_user_id_users", "orders", ["user_id"])
+        op.create_index(
+            "fk_orders_product_id_products", "orders", ["product_id"]
+        )
+
+    op.drop_index(op.f("ix_orders_product_id_id"), table_name="orders")
+    op.drop_index(op.f("ix_orders_user_id_id"), table_name="orders")
@@ -0,0 +1,30 @@
+"""products version
+
+Revision ID: b41f0c9e2d17
+Revises: 7d2c41e8b5a0
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b41f0c9e2d17"
+down_revision: Union[str, None] = "7d2c41e8b5a0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "products",
+        sa.Column(
+            "version", sa.Integer(), server_default="1", nullable=False
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("products", "version")
@@ -3,6 +3,14 @@ This package encapsulates functions and tools, related to
 all sorts of database interaction.
 """
 
+from .counts import *  # noqa: F401, F403
+from .engine import *  # noqa: F401, F403
+from .loaders import *  # noqa: F401, F403
+from .middlewares import *  # noqa: F401, F403
+from .pagination import *  # noqa: F401, F403
+from .profiling import *  # noqa: F401, F403
+from .replicas import *  # noqa: F401, F403
 from .repository import *  # noqa: F401, F403
 from .session import *  # noqa: F401, F403
+from .statements import *  # noqa: F401, F403
 from .transactions import *  # noqa: F401, F403
@@ -0,0 +1,93 @@
+"""
+This module includes tools for counting rows of tables.
+
+The exact count scans the table or the index, so it might be more
+expensive than the page itself. Hence the count could be also cached
+in the process memory or estimated from the table statistics.
+
+The cached count is dropped only once the transaction that changed
+the table is committed. Otherwise the concurrent read could cache
+the old count again before the commit and it would be kept for the TTL.
+"""
+
+import enum
+
+from cachetools import TTLCache
+from sqlalchemy import TextClause, event, text
+from sqlalchemy.orm import Session as SyncSession
+
+from src.infrastructure.application import settings
+
+__all__ = (
+    "CountMode",
+    "cached_count",
+    "estimated_count_query",
+    "invalidate_count",
+    "count_is_pending",
+)
+
+
+class CountMode(str, enum.Enum):
+    EXACT = "exact"
+    CACHED = "cached"
+    ESTIMATED = "estimated"
+
+
+# Counts are cached by the table name
+cached_count: TTLCache = TTLCache(
+    maxsize=1024, ttl=settings.database.count_cache_ttl
+)
+
+
+# Tables of the session whose counts are dropped after the commit
+_PENDING = "pending_counts"
+
+
+def invalidate_count(session: SyncSession, table: str) -> None:
+    """Drop the cached count of the table once the session commits."""
+
+    session.info.setdefault(_PENDING, set()).add(table)
+
+
+def count_is_pending(session: SyncSession, table: str) -> bool:
+    """Check whether the session changed the table and did not commit.
+    The count that is read within such a session should not be cached.
+    """
+
+    return table in session.info.get(_PENDING, ())
+
+
+@event.listens_for(SyncSession, "after_commit")
+def _drop_committed_counts(session: SyncSession) -> None:
+    for table in session.info.pop(_PENDING, ()):
+        cached_count.pop(table, None)
+
+
+@event.listens_for(SyncSession, "after_rollback")
+def _forget_pending_counts(session: SyncSession) -> None:
+    # NOTE: The rollback of the SAVEPOINT does not discard changes
+    #       of the outer transaction
+    if not session.in_nested_transaction():
+        session.info.pop(_PENDING, None)
+
+
+_ESTIMATED_COUNT_QUERIES: dict[str, str] = {
+    "mysql": (
+        "SELECT TABLE_ROWS FROM information_schema.TABLES "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table"
+    ),
+    "postgresql": (
+        "SELECT reltuples::bigint FROM pg_class WHERE relname = :table"
+    ),
+}
+
+
+def estimated_count_query(dialect: str, table: str) -> TextClause | None:
+    """Return the query that reads the number of rows from statistics.
+    None is returned if the dialect does not support it.
+    """
+
+    if (query := _ESTIMATED_COUNT_QUERIES.get(dialect)) is None:
+        return None
+
+    return text(query).bindparams(table=table)
@@ -1,18 +1,179 @@
+import time
 from functools import lru_cache
+from typing import Any
 
+from sqlalchemy import event, exc, make_url
 from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-from src.infrastructure.application import settings
+from src.infrastructure.application import MetricFamily, metrics, settings
 
+__all__ = ("create_engine", "pool_metrics")
 
-@lru_cache(maxsize=1)
-def create_engine() -> AsyncEngine:
+
+# The per-dialect arguments that are passed to the DBAPI connect() call
+_CONNECT_ARGS: dict[str, dict[str, Any]] = {
+    "sqlite": {"timeout": 30},
+    "mysql": {"connect_timeout": 10},
+}
+
+
+class _InstrumentedPool(AsyncAdaptedQueuePool):
+    """The queue pool that collects the checkout statistics.
+    The checkout time includes waiting for the free connection
+    and opening the new one if the pool is not full yet.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+
+        self.checkouts: int = 0
+        self.timeouts: int = 0
+        self.checkout_seconds: float = 0.0
+        self.checkout_seconds_max: float = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self.checkouts += 1
+            self.checkout_seconds += elapsed
+            self.checkout_seconds_max = max(
+                self.checkout_seconds_max, elapsed
+            )
+
+
+def _set_sqlite_pragma(dbapi_connection, _) -> None:
+    """Enable the write-ahead log, so readers do not block the writer."""
+
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+@lru_cache(maxsize=None)
+def create_engine(url: str | None = None) -> AsyncEngine:
     """Create a new async database engine.
     A function result is cached since there is not reason to
     initiate the engine more than once since session is created
     for each separate transaction if needed.
+
+    The primary database is used if the url is not provided.
     """
 
-    return create_async_engine(
-        settings.database.url, future=True, pool_pre_ping=True, echo=False
+    database = settings.database
+    dialect: str = make_url(url or database.url).get_backend_name()
+
+    engine: AsyncEngine = create_async_engine(
+        url or database.url,
+        poolclass=_InstrumentedPool,
+        pool_size=database.pool.size,
+        max_overflow=database.pool.max_overflow,
+        pool_timeout=database.pool.timeout,
+        pool_recycle=database.pool.recycle,
+        pool_pre_ping=database.pool.pre_ping,
+        query_cache_size=database.statement_cache_size,
+        connect_args={
+            **_CONNECT_ARGS.get(dialect, {}),
+            **database.connect_args,
+        },
+        echo=False,
     )
+
+    if dialect == "sqlite":
+        event.listen(engine.sync_engine, "connect", _set_sqlite_pragma)
+
+    return engine
+
+
+def pool_metrics(engine: AsyncEngine | None = None) -> dict[str, float]:
+    """Return the snapshot of the connection pool state."""
+
+    pool = (engine or create_engine()).pool
+    snapshot: dict[str, float] = {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
+
+    if isinstance(pool, _InstrumentedPool):
+        snapshot.update(
+            checkouts=pool.checkouts,
+            timeouts=pool.timeouts,
+            checkout_seconds=pool.checkout_seconds,
+            checkout_seconds_max=pool.checkout_seconds_max,
+        )
+
+    return snapshot
+
+
+# The name, the type, the merge mode and the description of each metric
+_POOL_METRICS: dict[str, tuple[str, str, str, str]] = {
+    "size": ("db_pool_size", "gauge", "sum", "The size of the pool"),
+    "checked_in": (
+        "db_pool_checked_in",
+        "gauge",
+        "sum",
+        "Connections that are idle in the pool",
+    ),
+    "checked_out": (
+        "db_pool_checked_out",
+        "gauge",
+        "sum",
+        "Connections that are in use",
+    ),
+    "overflow": (
+        "db_pool_overflow",
+        "gauge",
+        "sum",
+        "Connections over the size of the pool",
+    ),
+    "checkouts": (
+        "db_pool_checkouts_total",
+        "counter",
+        "sum",
+        "Checkouts of connections",
+    ),
+    "timeouts": (
+        "db_pool_timeouts_total",
+        "counter",
+        "sum",
+        "Checkouts that timed out waiting for the connection",
+    ),
+    "checkout_seconds": (
+        "db_pool_checkout_seconds_total",
+        "counter",
+        "sum",
+        "Time spent on checkouts of connections",
+    ),
+    "checkout_seconds_max": (
+        "db_pool_checkout_seconds_max",
+        "gauge",
+        "max",
+        "The longest checkout of the connection",
+    ),
+}
+
+
+def _collect_pool_metrics() -> list[MetricFamily]:
+    families: list[MetricFamily] = []
+
+    for key, value in pool_metrics().items():
+        name, kind, merge, description = _POOL_METRICS[key]
+        families.append(
+            MetricFamily(name, kind, description, [("", (), value)], merge)
+        )
+
+    return families
+
+
+metrics.register_collector(_collect_pool_metrics)
@@ -0,0 +1,113 @@
+"""
+This module includes the batch loader of rows by the primary key.
+
+Lookups that are awaited concurrently within the same event loop
+iteration are coalesced into a single `SELECT .. WHERE id IN (..)` query.
+Loaders are bound to the session, so they live as long as the request
+or the transaction and the loaded rows are never shared between them.
+"""
+
+import asyncio
+from typing import Generic, Iterable, Type
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.infrastructure.application import DatabaseError
+
+from ..tables import ConcreteTable
+from .session import CTX_SESSION, Session
+
+__all__ = ("BatchLoader", "get_loader")
+
+
+class BatchLoader(Session, Generic[ConcreteTable]):
+    """Load rows of the table by ids with as few queries as possible."""
+
+    def __init__(
+        self, schema_class: Type[ConcreteTable], lock: asyncio.Lock
+    ) -> None:
+        super().__init__()
+
+        self.schema_class = schema_class
+
+        # NOTE: The session does not allow concurrent queries,
+        #       so all loaders of the session share the same lock
+        self._lock = lock
+        self._loaded: dict[int, asyncio.Future] = {}
+        self._pending: dict[int, asyncio.Future] = {}
+        self._dispatching: asyncio.Task | None = None
+
+    async def load(self, id: int) -> ConcreteTable | None:
+        if (future := self._loaded.get(id)) is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._loaded[id] = self._pending[id] = future
+
+            # The dispatch is scheduled only for the first pending id.
+            # Others are collected until the loop gets to the callback.
+            if len(self._pending) == 1:
+                loop.call_soon(self._schedule)
+
+        # NOTE: The future is shared by all waiters of the id, so the
+        #       cancellation of one of them must not cancel the others
+        return await asyncio.shield(future)
+
+    def _schedule(self) -> None:
+        self._dispatching = asyncio.ensure_future(self._dispatch())
+
+    async def load_many(
+        self, ids: Iterable[int]
+    ) -> list[ConcreteTable | None]:
+        return list(await asyncio.gather(*(self.load(id) for id in ids)))
+
+    async def _dispatch(self) -> None:
+        pending, self._pending = self._pending, {}
+
+        try:
+            async with self._lock:
+                result = await self.execute(
+                    select(self.schema_class).where(
+                        self.schema_class.id.in_(pending)
+                    )
+                )
+                rows = {row.id: row for row in result.scalars().all()}
+        except BaseException as error:
+            # NOTE: Failed ids are dropped, so they are loaded again
+            #       by the next lookup instead of waiting forever
+            for id, future in pending.items():
+                self._loaded.pop(id, None)
+
+                if future.done():
+                    continue
+                elif isinstance(error, asyncio.CancelledError):
+                    future.cancel()
+                else:
+                    future.set_exception(error)
+
+            if not isinstance(error, Exception):
+                raise
+            return
+
+        for id, future in pending.items():
+            if not future.done():
+                future.set_result(rows.get(id))
+
+
+def get_loader(schema_class: Type[ConcreteTable]) -> BatchLoader:
+    """Return the batch loader of the table for the current session."""
+
+    try:
+        session: AsyncSession = CTX_SESSION.get()
+    except LookupError as err:
+        raise DatabaseError(
+            message="The session is not opened in the current context"
+        ) from err
+
+    lock = session.info.setdefault("loaders_lock", asyncio.Lock())
+    loaders: dict = session.info.setdefault("loaders", {})
+
+    if (loader := loaders.get(schema_class)) is None:
+        loader = loaders[schema_class] = BatchLoader(schema_class, lock)
+
+    return loader
@@ -0,0 +1,27 @@
+"""
+This module includes ASGI middlewares that are related
+to the database interaction.
+"""
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .session import session_scope
+
+__all__ = ("SessionMiddleware",)
+
+
+class SessionMiddleware:
+    """Open the separate session for each incoming HTTP request.
+    Repositories that are used outside of the transaction() context
+    manager get the request-scoped session instead of a shared one.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        async with session_scope():
+            await self.app(scope, receive, send)
@@ -0,0 +1,41 @@
+"""
+This module includes tools for the keyset (cursor) pagination.
+
+The cursor is an opaque string for the client. Internally it carries
+the name of the column that is used for seeking, the value of this
+column and the primary key of the last row on the page.
+"""
+
+import base64
+import json
+from typing import Any
+
+from src.infrastructure.application import BadRequestError
+
+__all__ = ("encode_cursor", "decode_cursor")
+
+
+def encode_cursor(by: str, value: Any, id: int) -> str:
+    """Build the opaque cursor that points right after the given row."""
+
+    raw: str = json.dumps([by, value, id], separators=(",", ":"), default=str)
+
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, by: str) -> tuple[Any, int]:
+    """Parse the cursor that is received from the client.
+    The cursor is valid only for the same seeking column.
+    """
+
+    padding = "=" * (-len(cursor) % 4)
+
+    try:
+        _by, value, id = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except (ValueError, TypeError) as err:
+        raise BadRequestError(message="Invalid cursor") from err
+
+    if _by != by or not isinstance(id, int):
+        raise BadRequestError(message="Invalid cursor")
+
+    return value, id
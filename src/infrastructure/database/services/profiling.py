@@ -0,0 +1,335 @@
+"""
+This module includes the opt-in instrumentation of database queries.
+
+Each query that is executed by the session is timed and aggregated by
+its fingerprint: the SQL text with literals replaced by placeholders.
+Aggregates are kept for the rolling window, so the top of queries
+reflects the recent load. Slow queries are logged with the repository
+method they come from and with their plan. The plan is read by the
+background task, so the query itself is not delayed by EXPLAIN.
+"""
+
+import hashlib
+import re
+import sys
+import time
+from functools import partial
+from typing import Any, AsyncIterator, Callable
+
+import structlog
+from cachetools import TTLCache
+from sqlalchemy import Select
+from sqlalchemy.engine import CursorResult, Result
+from sqlalchemy.ext.asyncio import AsyncResult
+
+from src.infrastructure.application import background_tasks, settings
+
+from .engine import create_engine
+
+logger = structlog.stdlib.get_logger()
+
+__all__ = ("QueryProfiler", "query_profiler")
+
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\bIN \((?:[^()]+)\)", re.IGNORECASE)
+
+# The prefix of the statement that shows its plan without running it
+_EXPLAIN: dict[str, str] = {
+    "sqlite": "EXPLAIN QUERY PLAN",
+    "mysql": "EXPLAIN",
+    "mariadb": "EXPLAIN",
+    "postgresql": "EXPLAIN",
+}
+
+
+class _QueryStats:
+    __slots__ = ("sql", "origin", "calls", "seconds", "max_seconds", "rows")
+
+    def __init__(self, sql: str, origin: str) -> None:
+        self.sql: str = sql
+        self.origin: str = origin
+        self.calls: int = 0
+        self.seconds: float = 0.0
+        self.max_seconds: float = 0.0
+        self.rows: int = 0
+
+
+def _normalize(query: Any) -> str:
+    sql = " ".join(str(query).split())
+    sql = _LITERALS.sub("?", sql)
+
+    return _IN_LISTS.sub("IN (...)", sql)
+
+
+def _origin() -> str:
+    """Find the first caller outside of the database services,
+    e.g. the repository method that executes the query.
+    Queries of the separate tasks (e.g. batch loaders) are attributed
+    to the last method of the services that was found.
+    """
+
+    frame = sys._getframe(2)
+    origin = "<unknown>"
+
+    while frame is not None:
+        module: str = frame.f_globals.get("__name__", "")
+        current = f"{module}:{frame.f_code.co_qualname}"
+
+        if module.startswith("asyncio"):
+            break
+        elif not module.startswith(__package__ or __name__):
+            return current
+
+        origin, frame = current, frame.f_back  # type: ignore[assignment]
+
+    return origin
+
+
+class _ProfiledStream:
+    """Count rows of the streamed result while they are iterated.
+    The time that the consumer spends on each row is not counted.
+    """
+
+    def __init__(
+        self, result: AsyncResult, done: Callable[[int, float], None]
+    ) -> None:
+        self._result: AsyncResult = result
+        self._done: Callable[[int, float], None] = done
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._result, name)
+
+    def __aiter__(self) -> AsyncIterator:
+        return self._iterate(self._result)
+
+    def scalars(self, index: int = 0) -> AsyncIterator:
+        return self._iterate(self._result.scalars(index))
+
+    async def _iterate(self, rows) -> AsyncIterator:
+        iterator = rows.__aiter__()
+        count, seconds = 0, 0.0
+
+        try:
+            while True:
+                started = time.perf_counter()
+
+                try:
+                    row = await iterator.__anext__()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    seconds += time.perf_counter() - started
+
+                count += 1
+                yield row
+        finally:
+            self._done(count, seconds)
+
+
+class QueryProfiler:
+    def __init__(
+        self,
+        enabled: bool,
+        slow_threshold: float,
+        explain: bool,
+        window: int,
+        max_fingerprints: int,
+    ) -> None:
+        self.enabled: bool = enabled
+        self.slow_threshold: float = slow_threshold
+        self.explain: bool = explain
+        self.window: int = window
+        self.max_fingerprints: int = max_fingerprints
+
+        self._current: dict[str, _QueryStats] = {}
+        self._previous: dict[str, _QueryStats] = {}
+        self._rotated_at: float = time.monotonic()
+
+        # Fingerprints of slow queries that are already explained
+        self._explained: TTLCache = TTLCache(maxsize=1024, ttl=window)
+
+    async def record(
+        self,
+        query: Any,
+        params: dict[str, Any] | list[dict] | None,
+        result: Result,
+        seconds: float,
+    ) -> Result:
+        """Aggregate the executed query.
+        Rows of the result are counted, so the result is buffered
+        and the new one is returned instead.
+        """
+
+        if isinstance(result, CursorResult) and not result.returns_rows:
+            rows = max(result.rowcount, 0)
+        else:
+            frozen = result.freeze()
+            rows, result = len(frozen.data), frozen()
+
+        self._aggregate(query, params, _origin(), rows, seconds)
+
+        return result
+
+    def record_stream(
+        self, query: Any, result: AsyncResult, seconds: float
+    ) -> AsyncResult:
+        """Aggregate the streamed query once its rows are iterated.
+        Rows are counted while they are fetched, so the result is not
+        buffered. Only the time of fetching is added to the duration.
+        """
+
+        origin = _origin()
+
+        def done(rows: int, fetching: float) -> None:
+            self._aggregate(query, None, origin, rows, seconds + fetching)
+
+        return _ProfiledStream(result, done)  # type: ignore[return-value]
+
+    def _aggregate(
+        self,
+        query: Any,
+        params: dict[str, Any] | list[dict] | None,
+        origin: str,
+        rows: int,
+        seconds: float,
+    ) -> None:
+        sql = _normalize(query)
+        fingerprint = hashlib.sha1(sql.encode()).hexdigest()[:16]
+
+        self._rotate()
+
+        if (stats := self._current.get(fingerprint)) is None:
+            if len(self._current) >= self.max_fingerprints:
+                return
+
+            stats = self._current[fingerprint] = _QueryStats(sql, origin)
+
+        stats.calls += 1
+        stats.seconds += seconds
+        stats.max_seconds = max(stats.max_seconds, seconds)
+        stats.rows += rows
+        stats.origin = origin
+
+        if seconds < self.slow_threshold:
+            return
+
+        if self.explain and fingerprint not in self._explained:
+            self._explained[fingerprint] = True
+            background_tasks.spawn(
+                partial(
+                    self._explain_slow,
+                    fingerprint,
+                    stats,
+                    query,
+                    params,
+                    seconds,
+                ),
+                name=f"explain-{fingerprint}",
+            )
+        else:
+            self._log_slow(fingerprint, stats, seconds)
+
+    def _rotate(self) -> None:
+        if (now := time.monotonic()) - self._rotated_at >= self.window:
+            self._previous, self._current = self._current, {}
+            self._rotated_at = now
+
+    async def _explain_slow(
+        self,
+        fingerprint: str,
+        stats: _QueryStats,
+        query: Any,
+        params: dict[str, Any] | list[dict] | None,
+        seconds: float,
+    ) -> None:
+        self._log_slow(
+            fingerprint, stats, seconds, plan=await _explain(query, params)
+        )
+
+    def _log_slow(
+        self,
+        fingerprint: str,
+        stats: _QueryStats,
+        seconds: float,
+        plan: list[str] | None = None,
+    ) -> None:
+        logger.warning(
+            "Slow query",
+            fingerprint=fingerprint,
+            sql=stats.sql,
+            origin=stats.origin,
+            duration_ms=seconds * 1000,
+            rows=stats.rows / stats.calls,
+            plan=plan,
+        )
+
+    def top(self, limit: int = 20) -> list[dict[str, Any]]:
+        """Return queries of the rolling window by the total time."""
+
+        self._rotate()
+        merged: dict[str, dict[str, Any]] = {}
+
+        for generation in (self._previous, self._current):
+            for fingerprint, stats in generation.items():
+                item = merged.setdefault(
+                    fingerprint,
+                    {
+                        "fingerprint": fingerprint,
+                        "sql": stats.sql,
+                        "calls": 0,
+                        "seconds": 0.0,
+                        "max_seconds": 0.0,
+                        "rows": 0,
+                    },
+                )
+                item["origin"] = stats.origin
+                item["calls"] += stats.calls
+                item["seconds"] += stats.seconds
+                item["max_seconds"] = max(
+                    item["max_seconds"], stats.max_seconds
+                )
+                item["rows"] += stats.rows
+
+        items = sorted(merged.values(), key=lambda item: -item["seconds"])
+
+        for item in items:
+            item["mean_seconds"] = item["seconds"] / item["calls"]
+
+        return items[:limit]
+
+
+async def _explain(
+    query: Any, params: dict[str, Any] | list[dict] | None
+) -> list[str] | None:
+    """Return the plan of the select query if the dialect supports it.
+    The plan is read within the separate connection, so the session
+    and its routing are not affected.
+    """
+
+    engine = create_engine()
+
+    if (
+        (prefix := _EXPLAIN.get(engine.dialect.name)) is None
+        or not isinstance(query, Select)
+        or isinstance(params, list)
+    ):
+        return None
+
+    try:
+        statement = query.params(**params) if params else query
+        sql: str = statement.compile(
+            dialect=engine.dialect, compile_kwargs={"literal_binds": True}
+        ).string
+
+        async with engine.connect() as connection:
+            result = await connection.exec_driver_sql(f"{prefix} {sql}")
+            return [" | ".join(map(str, row)) for row in result.all()]
+    except Exception as error:
+        logger.info("Query can not be explained", error=repr(error))
+        return None
+
+
+query_profiler = QueryProfiler(
+    **settings.database.profiling.model_dump(exclude={"admins"})
+)
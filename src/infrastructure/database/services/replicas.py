@@ -0,0 +1,56 @@
+"""
+This module includes the set of read replicas.
+
+Replicas are chosen by the round robin. The replica that failed
+is ejected for a while and the next ones are used instead.
+The primary database is used if there are no healthy replicas.
+"""
+
+import itertools
+import time
+from functools import lru_cache
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.infrastructure.application import settings
+
+from .engine import create_engine
+
+__all__ = ("ReplicaSet", "get_replicas")
+
+
+class ReplicaSet:
+    def __init__(self, engines: list[AsyncEngine], ejection: int) -> None:
+        self.engines: list[AsyncEngine] = engines
+        self._ejection: int = ejection
+        self._ejected_until: dict[AsyncEngine, float] = {}
+        self._counter = itertools.count()
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def choose(self) -> AsyncEngine | None:
+        """Return the next healthy replica if any."""
+
+        now = time.monotonic()
+
+        for _ in range(len(self.engines)):
+            engine = self.engines[next(self._counter) % len(self.engines)]
+
+            if self._ejected_until.get(engine, 0) <= now:
+                return engine
+
+        return None
+
+    def eject(self, engine: AsyncEngine) -> None:
+        """Do not use the replica until the ejection time is over."""
+
+        self._ejected_until[engine] = time.monotonic() + self._ejection
+
+
+@lru_cache(maxsize=1)
+def get_replicas() -> ReplicaSet:
+    return ReplicaSet(
+        engines=[create_engine(url) for url in settings.database.replicas],
+        ejection=settings.database.replica_ejection,
+    )
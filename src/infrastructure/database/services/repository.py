@@ -1,16 +1,39 @@
-from typing import Any, AsyncGenerator, Generic, Type
-
-from sqlalchemy import asc, delete, desc, func, select, update
+from collections import defaultdict
+from typing import Any, AsyncGenerator, Generic, Iterable, Type
+
+from sqlalchemy import (
+    and_,
+    asc,
+    bindparam,
+    delete,
+    desc,
+    func,
+    insert,
+    or_,
+    select,
+    update,
+)
 from sqlalchemy.engine import Result
+from sqlalchemy.ext.asyncio import AsyncResult
 
 from src.infrastructure.application import (
+    ConflictError,
     DatabaseError,
     NotFoundError,
     UnprocessableError,
 )
 
 from ..tables import ConcreteTable
+from .counts import (
+    CountMode,
+    cached_count,
+    count_is_pending,
+    estimated_count_query,
+    invalidate_count,
+)
+from .pagination import decode_cursor, encode_cursor
 from .session import Session
+from .statements import statements
 
 __all__ = ("BaseRepository",)
 
@@ -24,6 +47,16 @@ class BaseRepository(Session, Generic[ConcreteTable]):
 
     schema_class: Type[ConcreteTable]
 
+    # The number of rows that are fetched from the server-side cursor at once
+    _STREAM_CHUNK_SIZE: int = 1000
+
+    # The number of rows that are inserted by one statement
+    _BULK_CHUNK_SIZE: int = 1000
+
+    # The column that is incremented by each update if it is defined.
+    # The expected version is passed within the update payload.
+    version_column: str | None = None
+
     def __init__(self) -> None:
         super().__init__()
 
@@ -34,35 +67,179 @@ class BaseRepository(Session, Generic[ConcreteTable]):
                 )
             )
 
+    def _update_statement(
+        self, key: str, fields: tuple[str, ...], orm: bool = True
+    ):
+        """Build the update statement template with bound parameters.
+        The ORM statement returns the updated row if the dialect
+        supports it, the Core one is used for the executemany.
+        """
+
+        def build():
+            table = self.schema_class.__table__
+            query = update(self.schema_class if orm else table).where(
+                table.c[key] == bindparam("key")
+            )
+            values = {
+                field: bindparam(f"v_{field}")
+                for field in fields
+                if field != self.version_column
+            }
+
+            # NOTE: The expected version is checked within the same
+            #       statement, so there is no need to select it before
+            if self.version_column in fields:
+                version = table.c[self.version_column]
+                query = query.where(
+                    version == bindparam(f"v_{self.version_column}")
+                )
+                values[self.version_column] = version + 1
+
+            query = query.values(values)
+
+            if orm:
+                # NOTE: Objects of the identity map can not be synchronized
+                #       with bound values (they are evaluated as nulls),
+                #       so they are expired and loaded again instead
+                query = query.execution_options(synchronize_session=False)
+
+                if self._dialect.update_returning:
+                    query = query.returning(self.schema_class)
+
+            return query
+
+        return statements.get(
+            (self.schema_class, "update", key, fields, orm), build
+        )
+
+    @staticmethod
+    def _update_params(value: Any, payload: dict[str, Any]) -> dict:
+        return {
+            "key": value,
+            **{f"v_{field}": item for field, item in payload.items()},
+        }
+
+    def _expire_identities(
+        self, key: str, values: Iterable[Any], fields: Iterable[str]
+    ) -> None:
+        """Expire updated attributes of objects of the identity map,
+        so they are loaded from the next returned or selected row
+        instead of keeping stale values.
+        """
+
+        values = set(values)
+        fields = list(fields)
+
+        for instance in list(self._session.identity_map.values()):
+            if (
+                isinstance(instance, self.schema_class)
+                and instance.__dict__.get(key) in values
+            ):
+                self._session.expire(instance, fields)
+
     async def _update(
         self, key: str, value: Any, payload: dict[str, Any]
     ) -> ConcreteTable:
         """Updates an existed instance of the model in the related table.
         If some data is not exist in the payload then the null value will
-        be passed to the schema class."""
+        be passed to the schema class.
 
-        query = (
-            update(self.schema_class)
-            .where(getattr(self.schema_class, key) == value)
-            .values(payload)
-            .returning(self.schema_class)
+        If the version column is defined and passed within the payload,
+        the row is updated only if it still has this version. Otherwise
+        the ConflictError is raised. The NotFoundError is raised if there
+        is no row with the key at all.
+        The commit is up to the transaction that wraps this call.
+        """
+
+        self._expire_identities(key, [value], payload)
+        query = self._update_statement(key, tuple(sorted(payload)))
+        result: Result = await self.execute(
+            query, self._update_params(value, payload)
         )
-        result: Result = await self.execute(query)
-        # await self._session.flush()
-        await self._session.commit()
 
-        if not (schema := result.scalar_one_or_none()):
+        if self._dialect.update_returning:
+            schema = result.scalar_one_or_none()
+        elif result.rowcount:
+            # NOTE: The key itself might be updated as well
+            schema = await self._get(key, payload.get(key, value))
+        else:
+            schema = None
+
+        if schema is None:
+            await self._raise_missing(key, [value])
+
+            if self.version_column in payload:
+                raise ConflictError
+
             raise DatabaseError
 
         return schema
 
+    async def _update_many(
+        self, key: str, items: list[tuple[Any, dict[str, Any]]]
+    ) -> int:
+        """Update many rows by the key with the executemany.
+        Items are (value of the key, payload) pairs. Items with the same
+        set of fields are updated by the single statement.
+
+        The ConflictError is raised if any versioned row was changed
+        by someone else and the NotFoundError is raised if any versioned
+        row does not exist, so the whole transaction is rolled back.
+        Updated objects of the identity map are expired, so they should
+        be selected again before reading them.
+        """
+
+        groups: dict[tuple[str, ...], list[dict]] = defaultdict(list)
+        for value, payload in items:
+            groups[tuple(sorted(payload))].append(
+                self._update_params(value, payload)
+            )
+
+        total: int = 0
+        for fields, params in groups.items():
+            self._expire_identities(key, [p["key"] for p in params], fields)
+            query = self._update_statement(key, fields, orm=False)
+            updated: int = 0
+
+            # NOTE: Some drivers do not report the number of rows
+            #       for the executemany, so it can not be checked
+            if self._dialect.supports_sane_multi_rowcount:
+                result: Result = await self.execute(query, params)
+                updated = result.rowcount
+            else:
+                for _params in params:
+                    result = await self.execute(query, _params)
+                    updated += result.rowcount
+
+            if self.version_column in fields and updated < len(params):
+                await self._raise_missing(key, [p["key"] for p in params])
+                raise ConflictError
+
+            total += updated
+
+        return total
+
+    async def _raise_missing(self, key: str, values: list[Any]) -> None:
+        """Raise the NotFoundError if any of rows does not exist."""
+
+        column = self.schema_class.__table__.c[key]
+        result: Result = await self.execute(
+            select(func.count()).where(column.in_(set(values)))
+        )
+
+        if result.scalar() < len(set(values)):
+            raise NotFoundError
+
     async def _get(self, key: str, value: Any) -> [ConcreteTable, None]:
         """Return only one result by filters"""
 
-        query = select(self.schema_class).where(
-            getattr(self.schema_class, key) == value
+        query = statements.get(
+            (self.schema_class, "get", key),
+            lambda: select(self.schema_class).where(
+                getattr(self.schema_class, key) == bindparam("value")
+            ),
         )
-        result: Result = await self.execute(query)
+        result: Result = await self.execute(query, {"value": value})
 
         if not (_result := result.scalars().one_or_none()):
             return None
@@ -96,8 +273,88 @@ class BaseRepository(Session, Generic[ConcreteTable]):
         for schema in schemas:
             yield schema
 
-    async def _count(self) -> int:
-        result: Result = await self.execute(func.count(self.schema_class.id))
+    async def _get_page(
+        self,
+        cursor: str | None = None,
+        limit: int = 100,
+        by: str = "id",
+        filters: dict[str, Any] | None = None,
+    ) -> tuple[list[ConcreteTable], str | None]:
+        """Return the page of results using the keyset pagination.
+        Rows are ordered by the `by` column and the primary key, so the
+        next page is found by seeking after the last row instead of
+        skipping the offset. Hence the cost does not depend on the page
+        number as long as the column is indexed.
+
+        Rows are filtered by equality of the given columns. The index
+        should start with these columns followed by the `by` column.
+
+        The cursor for the next page is None if there are no more rows.
+        """
+
+        column = getattr(self.schema_class, by)
+        primary_key = self.schema_class.id
+        query = select(self.schema_class).where(
+            *(
+                getattr(self.schema_class, key) == value
+                for key, value in (filters or {}).items()
+            )
+        )
+
+        if cursor is not None:
+            value, id = decode_cursor(cursor, by=by)
+            query = query.where(
+                primary_key > id
+                if by == "id"
+                else or_(
+                    column > value, and_(column == value, primary_key > id)
+                )
+            )
+
+        order_by = (primary_key,) if by == "id" else (column, primary_key)
+
+        # NOTE: One extra row is fetched to figure out
+        #       whether the next page exists
+        result: Result = await self.execute(
+            query.order_by(*order_by).limit(limit + 1)
+        )
+        schemas = list(result.scalars().all())
+
+        if len(schemas) <= limit:
+            return schemas, None
+
+        schemas = schemas[:limit]
+        last = schemas[-1]
+
+        return schemas, encode_cursor(by, getattr(last, by), last.id)
+
+    async def _count(self, mode: CountMode = CountMode.EXACT) -> int:
+        """Count rows of the table.
+        The cached count is invalidated once the transaction that inserts
+        or deletes rows is committed by this process. The estimated count
+        is taken from the table statistics if the dialect supports it,
+        otherwise it is exact.
+        """
+
+        table: str = self.schema_class.__tablename__
+        pending = count_is_pending(self._session.sync_session, table)
+
+        if mode == CountMode.CACHED and not pending:
+            if (value := cached_count.get(table)) is not None:
+                return value
+
+        if mode == CountMode.ESTIMATED and (
+            query := estimated_count_query(self._dialect.name, table)
+        ) is not None:
+            result: Result = await self.execute(query)
+
+            # NOTE: Statistics might be not collected yet
+            if (value := result.scalar()) is not None and value >= 0:
+                return int(value)
+
+        result = await self.execute(
+            select(func.count(self.schema_class.id))
+        )
         value = result.scalar()
 
         if not isinstance(value, int):
@@ -108,8 +365,16 @@ class BaseRepository(Session, Generic[ConcreteTable]):
                 ),
             )
 
+        if not pending:
+            cached_count[table] = value
+
         return value
 
+    def _invalidate_count(self) -> None:
+        invalidate_count(
+            self._session.sync_session, self.schema_class.__tablename__
+        )
+
     async def _first(self, by: str = "id") -> ConcreteTable:
         result: Result = await self.execute(
             select(self.schema_class).order_by(asc(by)).limit(1)
@@ -134,18 +399,91 @@ class BaseRepository(Session, Generic[ConcreteTable]):
         try:
             schema = self.schema_class(**payload)
             self._session.add(schema)
-            # await self._session.flush()
-            await self._session.commit()
+            await self._session.flush()
             await self._session.refresh(schema)
+            self._invalidate_count()
             return schema
         except self._ERRORS as err:
             raise DatabaseError from err
 
+    async def _save_many(
+        self, payloads: list[dict[str, Any]]
+    ) -> list[ConcreteTable]:
+        """Insert all rows within the current transaction by chunks.
+        If the dialect supports RETURNING for executemany, each chunk is
+        inserted by `INSERT .. RETURNING`. Otherwise each chunk is
+        inserted by the single multi-row `INSERT` and rows are selected
+        back by the range of generated ids, so there are two round trips
+        per chunk instead of one per row.
+        """
+
+        schemas: list[ConcreteTable] = []
+
+        try:
+            for start in range(0, len(payloads), self._BULK_CHUNK_SIZE):
+                chunk = payloads[start : start + self._BULK_CHUNK_SIZE]
+                schemas.extend(await self._insert_chunk(chunk))
+        except self._ERRORS as err:
+            raise DatabaseError from err
+
+        self._invalidate_count()
+
+        return schemas
+
+    async def _insert_chunk(
+        self, chunk: list[dict[str, Any]]
+    ) -> list[ConcreteTable]:
+        dialect = self._dialect
+
+        if dialect.insert_executemany_returning:
+            query = insert(self.schema_class).returning(self.schema_class)
+            result = await self._session.scalars(query, chunk)
+
+            return list(result.all())
+
+        # NOTE: Ids are generated by the database only if they are
+        #       not passed, otherwise the range is not contiguous
+        if any("id" in payload for payload in chunk):
+            schemas = [self.schema_class(**payload) for payload in chunk]
+            self._session.add_all(schemas)
+            await self._session.flush()
+
+            return schemas
+
+        table = self.schema_class.__table__
+        result = await self._session.execute(insert(table).values(chunk))
+
+        # NOTE: MySQL reports the id of the first row of the multi-row
+        #       INSERT while SQLite reports the last one. Ids of rows of
+        #       the single INSERT are consecutive as long as
+        #       `auto_increment_increment` is 1, which is the default.
+        if dialect.name in ("mysql", "mariadb"):
+            first = result.lastrowid
+        else:
+            first = result.lastrowid - len(chunk) + 1
+
+        primary_key = self.schema_class.id
+        result = await self._session.scalars(
+            select(self.schema_class)
+            .where(primary_key >= first, primary_key < first + len(chunk))
+            .order_by(primary_key)
+        )
+
+        return list(result.all())
+
     async def _all(self) -> AsyncGenerator[ConcreteTable, None]:
-        result: Result = await self.execute(select(self.schema_class))
-        schemas = result.scalars().all()
+        """Iterate over all rows of the table.
+        Rows are streamed by chunks from the server-side cursor
+        instead of loading the whole table into the memory.
+        """
 
-        for schema in schemas:
+        result: AsyncResult = await self.stream(
+            select(self.schema_class)
+            .order_by(self.schema_class.id)
+            .execution_options(yield_per=self._STREAM_CHUNK_SIZE)
+        )
+
+        async for schema in result.scalars():
             yield schema
 
     async def _delete(self, id: int) -> None:
@@ -153,3 +491,4 @@ class BaseRepository(Session, Generic[ConcreteTable]):
             delete(self.schema_class).where(self.schema_class.id == id)
         )
         await self._session.flush()
+        self._invalidate_count()
@@ -1,27 +1,102 @@
+import time
+from contextlib import asynccontextmanager
 from contextvars import ContextVar
+from typing import Any, AsyncGenerator
 
-from sqlalchemy.engine import ResultProxy
-from sqlalchemy.exc import IntegrityError, InvalidRequestError
-from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.engine import Dialect, Engine, ResultProxy
+from sqlalchemy.exc import (
+    IntegrityError,
+    InterfaceError,
+    InvalidRequestError,
+    OperationalError,
+)
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncResult, AsyncSession
+from sqlalchemy.orm import Session as SyncSession
 
 from src.infrastructure.application import DatabaseError
 
 from .engine import create_engine
+from .profiling import query_profiler
+from .replicas import get_replicas
+
+__all__ = ("create_session", "session_scope", "CTX_SESSION")
+
+
+class _RoutingSession(SyncSession):
+    """Route reads to the replica and writes to the primary database.
+    Once the session writes anything, all next queries are sent
+    to the primary, so the session always reads its own writes.
+    The replica is chosen once per session.
+
+    Any statement that is not DML is considered as the read
+    (e.g. selects, functions or text clauses), so raw writes
+    should be performed within the session that is already pinned.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs) -> Engine:
+        primary: Engine = create_engine().sync_engine
+
+        if self.info.get("primary"):
+            return primary
+
+        if (
+            self._flushing
+            or getattr(clause, "is_dml", False)
+            or getattr(clause, "_for_update_arg", None) is not None
+        ):
+            self.info["primary"] = True
+            return primary
+
+        if clause is None:
+            return primary
+
+        if (replica := self.info.get("replica")) is None:
+            if (replica := get_replicas().choose()) is None:
+                return primary
 
-__all__ = ("create_session", "CTX_SESSION")
+            self.info["replica"] = replica
+
+        return replica.sync_engine
 
 
 def create_session(engine: AsyncEngine | None = None) -> AsyncSession:
-    """Creates a new async session to execute SQL queries."""
+    """Creates a new async session to execute SQL queries.
+    Reads are routed to replicas if they are configured
+    and the engine is not provided explicitly.
+    """
+
+    if engine is None and get_replicas():
+        return AsyncSession(
+            sync_session_class=_RoutingSession,
+            expire_on_commit=False,
+            autoflush=False,
+        )
 
     return AsyncSession(
         engine or create_engine(), expire_on_commit=False, autoflush=False
     )
 
 
-CTX_SESSION: ContextVar[AsyncSession] = ContextVar(
-    "session", default=create_session()
-)
+# NOTE: There is no default session on purpose. Each request or
+#       transaction binds its own session to the current context,
+#       so concurrent requests never share the same AsyncSession.
+CTX_SESSION: ContextVar[AsyncSession] = ContextVar("session")
+
+
+@asynccontextmanager
+async def session_scope() -> AsyncGenerator[AsyncSession, None]:
+    """Bind a new session to the current context for the scope lifetime.
+    The connection is returned to the engine pool once the scope is left.
+    """
+
+    session: AsyncSession = create_session()
+    token = CTX_SESSION.set(session)
+
+    try:
+        yield session
+    finally:
+        CTX_SESSION.reset(token)
+        await session.close()
 
 
 class Session:
@@ -30,12 +105,77 @@ class Session:
     # All sqlalchemy errors that can be raised
     _ERRORS = (IntegrityError, InvalidRequestError)
 
+    # Errors that point to the unavailable database
+    _CONNECTION_ERRORS = (OperationalError, InterfaceError)
+
     def __init__(self) -> None:
-        self._session: AsyncSession = CTX_SESSION.get()
+        try:
+            self._session: AsyncSession = CTX_SESSION.get()
+        except LookupError as err:
+            raise DatabaseError(
+                message="The session is not opened in the current context"
+            ) from err
 
-    async def execute(self, query) -> ResultProxy:
+    @property
+    def _dialect(self) -> Dialect:
+        """The dialect of the primary database.
+        Replicas are expected to use the same one.
+        """
+
+        return create_engine().dialect
+
+    async def execute(
+        self, query, params: dict[str, Any] | list[dict] | None = None
+    ) -> ResultProxy:
+        if not query_profiler.enabled:
+            return await self._execute(query, params)
+
+        started = time.perf_counter()
+        result = await self._execute(query, params)
+
+        return await query_profiler.record(
+            query, params, result, time.perf_counter() - started
+        )
+
+    async def _execute(
+        self, query, params: dict[str, Any] | list[dict] | None
+    ) -> ResultProxy:
+        try:
+            result = await self._session.execute(query, params)
+            return result
+        except self._ERRORS as err:
+            raise DatabaseError from err
+        except self._CONNECTION_ERRORS as err:
+            self._eject_replica()
+            raise DatabaseError from err
+
+    async def stream(self, query) -> AsyncResult:
+        """Execute the query using the server-side cursor.
+        Rows are fetched lazily while the result is iterated.
+        """
+
+        if not query_profiler.enabled:
+            return await self._stream(query)
+
+        started = time.perf_counter()
+        result = await self._stream(query)
+
+        return query_profiler.record_stream(
+            query, result, time.perf_counter() - started
+        )
+
+    async def _stream(self, query) -> AsyncResult:
         try:
-            result = await self._session.execute(query)
+            result = await self._session.stream(query)
             return result
         except self._ERRORS as err:
             raise DatabaseError from err
+        except self._CONNECTION_ERRORS as err:
+            self._eject_replica()
+            raise DatabaseError from err
+
+    def _eject_replica(self) -> None:
+        """Stop using the replica of the session if it is failed."""
+
+        if (replica := self._session.info.pop("replica", None)) is not None:
+            get_replicas().eject(replica)
@@ -0,0 +1,74 @@
+"""
+This module includes the cache of statement templates.
+
+Statements are built once per repository and key with bound parameters
+instead of the literal values, so the same statement object is reused
+for each call. It skips the construction of the statement and lets
+SQLAlchemy find the compiled form in its cache faster.
+"""
+
+from typing import Any, Callable, Hashable
+
+from sqlalchemy.sql import Executable
+
+from src.infrastructure.application import MetricFamily, metrics
+
+__all__ = ("StatementCache", "statements")
+
+
+class StatementCache:
+    def __init__(self) -> None:
+        self._statements: dict[Hashable, Executable] = {}
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def get(self, key: Hashable, build: Callable[[], Executable]) -> Any:
+        """Return the cached statement or build it if it does not exist."""
+
+        try:
+            statement = self._statements[key]
+            self.hits += 1
+        except KeyError:
+            statement = self._statements[key] = build()
+            self.misses += 1
+
+        return statement
+
+    def stats(self) -> dict[str, float]:
+        total = self.hits + self.misses
+
+        return {
+            "size": len(self._statements),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+statements = StatementCache()
+
+
+def _collect_statement_metrics() -> list[MetricFamily]:
+    stats = statements.stats()
+
+    return [
+        MetricFamily(
+            name="db_statement_cache_size",
+            kind="gauge",
+            description="The number of cached statement templates",
+            samples=[("", (), stats["size"])],
+            merge="max",
+        ),
+        MetricFamily(
+            name="db_statement_cache_requests_total",
+            kind="counter",
+            description="Lookups of statement templates by the result",
+            samples=[
+                ("", (("result", "hit"),), stats["hits"]),
+                ("", (("result", "miss"),), stats["misses"]),
+            ],
+        ),
+    ]
+
+
+metrics.register_collector(_collect_statement_metrics)
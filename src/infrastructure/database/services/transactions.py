@@ -1,30 +1,124 @@
+import time
+from collections import defaultdict
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Awaitable, Callable
 
 import structlog
-
-logger = structlog.stdlib.get_logger()
+from sqlalchemy import event
 from sqlalchemy.exc import IntegrityError, InvalidRequestError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ORMExecuteState
+from sqlalchemy.orm import Session as SyncSession
+
+from src.infrastructure.application import (
+    DatabaseError,
+    MetricFamily,
+    metrics,
+)
+
+from .session import CTX_SESSION, session_scope
+
+logger = structlog.stdlib.get_logger()
+
+__all__ = ("transaction", "transaction_metrics")
+
+
+# The nesting level of transaction() blocks within the session
+_DEPTH = "transaction_depth"
+
+# Set if the current database transaction has written anything
+_WRITES = "transaction_writes"
+
+# The number of calls and the total duration of each operation
+_TIMINGS: dict[str, list[float]] = defaultdict(lambda: [0, 0.0])
+
+
+@event.listens_for(SyncSession, "do_orm_execute")
+def _mark_statement_writes(state: ORMExecuteState) -> None:
+    # NOTE: Reads are not only selects (e.g. functions or text clauses),
+    #       so writes are detected by the statement type
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info[_WRITES] = True
+
+
+@event.listens_for(SyncSession, "after_flush")
+def _mark_flush_writes(session: SyncSession, _) -> None:
+    session.info[_WRITES] = True
+
+
+async def _timed(name: str, operation: Callable[[], Awaitable]) -> None:
+    started = time.perf_counter()
+
+    try:
+        await operation()
+    finally:
+        timing = _TIMINGS[name]
+        timing[0] += 1
+        timing[1] += time.perf_counter() - started
+
+
+def transaction_metrics() -> dict[str, dict[str, float]]:
+    """Return the number and the duration of commits and rollbacks."""
+
+    return {
+        name: {"count": count, "seconds": seconds}
+        for name, (count, seconds) in _TIMINGS.items()
+    }
 
-from src.infrastructure.application import DatabaseError
 
-from .session import CTX_SESSION, create_session
+def _collect_transaction_metrics() -> list[MetricFamily]:
+    return [
+        MetricFamily(
+            name=f"db_transaction_operations_{suffix}",
+            kind="counter",
+            description=description,
+            samples=[
+                ("", (("operation", name),), timing[field])
+                for name, timing in transaction_metrics().items()
+            ],
+        )
+        for field, suffix, description in (
+            ("count", "total", "The number of transaction operations"),
+            ("seconds", "seconds", "The duration of transaction operations"),
+        )
+    ]
 
-__all__ = ("transaction",)
+
+metrics.register_collector(_collect_transaction_metrics)
 
 
 @asynccontextmanager
-async def transaction() -> AsyncGenerator[AsyncSession, None]:
-    """Use this context manager to perform database transactions. in any
-    coroutine in the source code."""
+async def _savepoint(session: AsyncSession) -> AsyncGenerator[None, None]:
+    """The nested transaction that is rolled back independently."""
+
+    nested = await session.begin_nested()
+
+    try:
+        yield
+    except BaseException:
+        await _timed("savepoint_rollback", nested.rollback)
+        raise
+    else:
+        await _timed("savepoint_release", nested.commit)
 
-    session: AsyncSession = create_session()
-    CTX_SESSION.set(session)
+
+@asynccontextmanager
+async def _top_level(session: AsyncSession) -> AsyncGenerator[None, None]:
+    """The database transaction that is committed only if anything
+    was written. Otherwise the transaction is just closed, so the
+    connection is returned to the pool and the next transaction within
+    the same session does not read the stale snapshot.
+    Loaded objects are detached instead of being expired by rollback,
+    so they are still readable after the block.
+    """
 
     try:
-        yield session
-        await session.commit()
+        yield
+
+        if session.info.pop(_WRITES, False):
+            await _timed("commit", session.commit)
+        else:
+            await _timed("close", session.close)
     except DatabaseError as error:
         # NOTE: If any sort of issues are occurred in the code
         #       they are handled on the BaseCRUD level and raised
@@ -33,13 +127,48 @@ async def transaction() -> AsyncGenerator[AsyncSession, None]:
         #       levels it is possible that `await session.commit()`
         #       would raise an error.
         logger.error(f"Rolling back changes. {error}")
-        await session.rollback()
+        await _rollback(session)
         raise DatabaseError from error
     except (IntegrityError, InvalidRequestError) as error:
         # NOTE: Since there is a session commit on this level it should
         #       be handled because it can raise some errors also
         logger.error(f"Rolling back changes.\n{error}")
-        await session.rollback()
+        await _rollback(session)
+    except BaseException:
+        await _rollback(session)
+        raise
+
+
+async def _rollback(session: AsyncSession) -> None:
+    session.info.pop(_WRITES, None)
+    await _timed("rollback", session.rollback)
+
+
+@asynccontextmanager
+async def transaction() -> AsyncGenerator[AsyncSession, None]:
+    """Use this context manager to perform database transactions. in any
+    coroutine in the source code.
+
+    The session of the current request is reused if it exists.
+    Nested blocks are performed within SAVEPOINTs.
+    """
+
+    if (session := CTX_SESSION.get(None)) is None:
+        async with session_scope() as session:
+            async with _transaction(session):
+                yield session
+    else:
+        async with _transaction(session):
+            yield session
+
+
+@asynccontextmanager
+async def _transaction(session: AsyncSession) -> AsyncGenerator[None, None]:
+    depth: int = session.info.get(_DEPTH, 0)
+    session.info[_DEPTH] = depth + 1
+
+    try:
+        async with _savepoint(session) if depth else _top_level(session):
+            yield
     finally:
-        await session.close()
-        await session.close()
+        session.info[_DEPTH] = depth
@@ -9,6 +9,7 @@ from sqlalchemy import (
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     MetaData,
     SmallInteger,
@@ -81,9 +82,32 @@ class ProductsTable(Base):
     name: str = Column(String(255), nullable=False)
     price: int = Column(Integer, nullable=False)
 
+    # Incremented by each update to detect concurrent changes
+    version: int = Column(
+        Integer, nullable=False, default=1, server_default="1"
+    )
+
 
 class OrdersTable(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # NOTE: Orders of the user or the product are paginated by id,
+        #       so both the lookup and the order are served by the index.
+        #       PostgreSQL includes the rest of columns into the index,
+        #       so pages are read with the index-only scan.
+        Index(
+            "ix_orders_user_id_id",
+            "user_id",
+            "id",
+            postgresql_include=["amount", "product_id"],
+        ),
+        Index(
+            "ix_orders_product_id_id",
+            "product_id",
+            "id",
+            postgresql_include=["amount", "user_id"],
+        ),
+    )
 
     id: int = Column(Integer, primary_key=True)
     amount: int = Column(Integer, nullable=False, default=1)
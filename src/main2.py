@@ -4,6 +4,7 @@ from src import presentation
 from src.infrastructure.application import configure_logger
 from src.infrastructure.application import create as application_factory
 from src.infrastructure.application import settings
+from src.infrastructure.database import SessionMiddleware
 
 # Adjust the logging
 # -------------------------------
@@ -19,7 +20,14 @@ app: FastAPI = application_factory(
         presentation.products.rest.router,
         presentation.orders.rest.router,
         presentation.users.rest.router,
+        # NOTE: There is nothing to show unless queries are profiled
+        *(
+            (presentation.admin.rest.router,)
+            if settings.database.profiling.enabled
+            else ()
+        ),
     ),
+    middlewares=[SessionMiddleware],
     startup_tasks=[],
     shutdown_tasks=[],
     startup_processes=[],
@@ -1 +1 @@
-from . import authentication, orders, products, users  # noqa: F401
+from . import admin, authentication, orders, products, users  # noqa: F401
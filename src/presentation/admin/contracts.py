@@ -0,0 +1,16 @@
+from pydantic import Field
+
+from src.infrastructure.application import PublicEntity
+
+
+class QueryStatsPublic(PublicEntity):
+    """Aggregated executions of the query within the rolling window."""
+
+    fingerprint: str = Field(description="The hash of the normalized SQL")
+    sql: str = Field(description="The SQL with literals replaced by '?'")
+    origin: str = Field(description="The last caller of the query")
+    calls: int
+    seconds: float = Field(description="The total execution time")
+    mean_seconds: float
+    max_seconds: float
+    rows: int = Field(description="The total number of rows")
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, Query, status
+
+from src.application.authentication import get_current_user
+from src.domain.users import UserFlat
+from src.infrastructure.application import (
+    AuthorizationError,
+    ResponseMulti,
+    response_multi,
+    settings,
+)
+from src.infrastructure.database import query_profiler
+
+from .contracts import QueryStatsPublic
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@router.get("/queries", status_code=status.HTTP_200_OK)
+async def queries_top(
+    limit: int = Query(default=20, ge=1, le=1000),
+    user: UserFlat = Depends(get_current_user),
+) -> ResponseMulti[QueryStatsPublic]:
+    """Get the top of database queries by the total execution time.
+    Queries are collected only if DATABASE__PROFILING__ENABLED is set
+    and they are available only for DATABASE__PROFILING__ADMINS.
+    """
+
+    if user.username not in settings.database.profiling.admins:
+        raise AuthorizationError(message="Queries are available for admins")
+
+    return response_multi(QueryStatsPublic, query_profiler.top(limit))
@@ -92,7 +92,7 @@ async def create_user(
             detail="User with this email already exist",
         )
 
-    schema.password = authentication.hash_password(schema.password)
+    schema.password = await authentication.hash_password(schema.password)
     user: UserFlat = await users.create(UserUncommited(**schema.model_dump()))
 
     user_public = UserPublic.model_validate(user)
@@ -1,6 +1,8 @@
 from pydantic import Field
 
 from src.infrastructure.application import PublicEntity
+from src.presentation.products.contracts import ProductPublic
+from src.presentation.users.contracts import UserPublic
 
 
 class _OrderBase(PublicEntity):
@@ -16,3 +18,10 @@ class OrderPublic(_OrderBase):
     """The internal application representation."""
 
     id: int
+
+
+class OrderAggregatePublic(OrderPublic):
+    """The order with related data that is included on demand."""
+
+    product: ProductPublic | None = None
+    user: UserPublic | None = None
@@ -1,38 +1,166 @@
-from fastapi import APIRouter, Depends, Request, status
+import hashlib
+
+from fastapi import APIRouter, Depends, Header, Query, Request, status
 
 from src.application import orders
 from src.application.authentication import get_current_user
 from src.domain.orders import Order, OrderFlat
 from src.domain.users import UserFlat
-from src.infrastructure.application import Response, ResponseMulti
+from src.infrastructure.application import (
+    JSONBytesResponse,
+    NDJSONResponse,
+    Response,
+    ResponseMulti,
+    accepts_ndjson,
+    idempotency,
+    response_multi,
+)
+from src.infrastructure.database import CountMode
+
+from .contracts import (
+    OrderAggregatePublic,
+    OrderCreateRequestBody,
+    OrderPublic,
+)
 
-from .contracts import OrderCreateRequestBody, OrderPublic
+# The related data that can be included into the list of orders
+_INCLUDE = {"product", "user"}
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
 
 @router.get("", status_code=status.HTTP_200_OK)
 async def orders_list(
-    request: Request, user: UserFlat = Depends(get_current_user)
+    request: Request,
+    cursor: str | None = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    include: str | None = Query(
+        default=None, pattern=r"^(product|user)(,(product|user))*$"
+    ),
+    count: CountMode | None = None,
+    user: UserFlat = Depends(get_current_user),
+) -> ResponseMulti[OrderAggregatePublic]:
+    """Get the page of orders.
+    All orders are streamed if the client accepts application/x-ndjson.
+    Related products and users are included on demand,
+    e.g. ?include=product,user
+    The total is counted on demand with the given mode, e.g. ?count=cached
+    """
+
+    if accepts_ndjson(request):
+        return NDJSONResponse(orders.stream_all(), schema=OrderPublic)
+
+    total: int | None = await orders.count(count) if count else None
+
+    if include:
+        included = set(include.split(","))
+        _aggregates, next_cursor = await orders.get_page_aggregates(
+            cursor=cursor, limit=limit, include=included
+        )
+
+        return response_multi(
+            OrderAggregatePublic,
+            _aggregates,
+            next_cursor=next_cursor,
+            total=total,
+            exclude=_INCLUDE - included,
+        )
+
+    _orders, next_cursor = await orders.get_page(cursor=cursor, limit=limit)
+
+    return response_multi(
+        OrderPublic, _orders, next_cursor=next_cursor, total=total
+    )
+
+
+@router.get("/mine", status_code=status.HTTP_200_OK)
+async def orders_mine(
+    cursor: str | None = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    user: UserFlat = Depends(get_current_user),
 ) -> ResponseMulti[OrderPublic]:
-    """Get all orders."""
+    """Get the page of orders of the current user."""
 
-    _orders: list[OrderFlat] = await orders.get_all()
-    _orders_public = [OrderPublic.model_validate(order) for order in _orders]
+    _orders, next_cursor = await orders.get_user_page(
+        user.id, cursor=cursor, limit=limit
+    )
 
-    return ResponseMulti[OrderPublic](result=_orders_public)
+    return response_multi(OrderPublic, _orders, next_cursor=next_cursor)
+
+
+@router.get("/products/{product_id}", status_code=status.HTTP_200_OK)
+async def orders_by_product(
+    product_id: int,
+    cursor: str | None = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    user: UserFlat = Depends(get_current_user),
+) -> ResponseMulti[OrderPublic]:
+    """Get the page of orders of the product."""
+
+    _orders, next_cursor = await orders.get_product_page(
+        product_id, cursor=cursor, limit=limit
+    )
+
+    return response_multi(OrderPublic, _orders, next_cursor=next_cursor)
 
 
 @router.post("", status_code=status.HTTP_201_CREATED)
 async def order_create(
     request: Request,
     schema: OrderCreateRequestBody,
+    idempotency_key: str | None = Header(default=None, max_length=255),
     user: UserFlat = Depends(get_current_user),
 ) -> Response[OrderPublic]:
-    """Create a new order from huge json, does not matter..."""
+    """Create a new order from huge json, does not matter...
+    Retries with the same Idempotency-Key header get the response
+    of the first request instead of creating another order.
+    """
+
+    async def _create() -> bytes:
+        # Save product to the database
+        order: Order = await orders.create(
+            payload=schema.model_dump(), user=user
+        )
+        response = Response[OrderPublic](
+            result=OrderPublic.model_validate(order)
+        )
+
+        return response.model_dump_json(by_alias=True).encode()
+
+    if idempotency_key is None:
+        return JSONBytesResponse(
+            await _create(), status_code=status.HTTP_201_CREATED
+        )
+
+    content, replayed = await idempotency.perform(
+        key=f"orders:{user.id}:{idempotency_key}",
+        fingerprint=hashlib.sha256(
+            schema.model_dump_json().encode()
+        ).hexdigest(),
+        operation=_create,
+    )
+
+    return JSONBytesResponse(
+        content,
+        status_code=status.HTTP_201_CREATED,
+        headers={"Idempotent-Replayed": "true"} if replayed else None,
+    )
+
+
+@router.post("/bulk", status_code=status.HTTP_201_CREATED)
+async def orders_bulk_create(
+    request: Request,
+    schemas: list[OrderCreateRequestBody],
+    user: UserFlat = Depends(get_current_user),
+) -> ResponseMulti[OrderPublic]:
+    """Create many orders within the single transaction.
+    Validation errors are reported for each item separately.
+    """
 
-    # Save product to the database
-    order: Order = await orders.create(payload=schema.model_dump(), user=user)
-    order_public = OrderPublic.model_validate(order)
+    _orders: list[OrderFlat] = await orders.create_many(
+        payloads=[schema.model_dump() for schema in schemas], user=user
+    )
 
-    return Response[OrderPublic](result=order_public)
+    return response_multi(
+        OrderPublic, _orders, status_code=status.HTTP_201_CREATED
+    )
@@ -1,14 +1,19 @@
 import structlog
-from fastapi import APIRouter, Depends, Request, status
+from fastapi import APIRouter, Depends, Query, Request, status
 
 from src.application import authentication, products
-from src.domain.products import (
-    ProductFlat,
-    ProductRepository,
-    ProductUncommited,
-)
+from src.domain.products import ProductFlat, ProductUncommited
 from src.domain.users import UserFlat
-from src.infrastructure.application import Response, ResponseMulti
+from src.infrastructure.application import (
+    NDJSONResponse,
+    Response,
+    ResponseMulti,
+    accepts_ndjson,
+    etag_matches,
+    not_modified,
+    response_multi,
+)
+from src.infrastructure.database import CountMode
 
 from .contracts import ProductCreateRequestBody, ProductPublic
 
@@ -17,16 +22,38 @@ router = APIRouter(prefix="/products", tags=["Products"])
 
 
 @router.get("", status_code=status.HTTP_200_OK)
-async def products_list(request: Request) -> ResponseMulti[ProductPublic]:
-    """Get all products."""
+async def products_list(
+    request: Request,
+    cursor: str | None = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    count: CountMode | None = None,
+) -> ResponseMulti[ProductPublic]:
+    """Get the page of products.
+    All products are streamed if the client accepts application/x-ndjson.
+    The page is not sent again if the client has the same ETag.
+    The total is counted on demand with the given mode, e.g. ?count=cached
+    """
 
-    _products: list[ProductFlat] = await products.get_all()
-    # await logger.info("test")
-    _products_public: list[ProductPublic] = [
-        ProductPublic.model_validate(product) for product in _products
-    ]
+    if accepts_ndjson(request):
+        return NDJSONResponse(products.stream_all(), schema=ProductPublic)
+
+    etag = await products.get_page_etag(
+        cursor=cursor, limit=limit, count=count
+    )
+
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    _products, next_cursor = await products.get_page(
+        cursor=cursor, limit=limit
+    )
+    total: int | None = await products.count(count) if count else None
+    response = response_multi(
+        ProductPublic, _products, next_cursor=next_cursor, total=total
+    )
+    response.headers["ETag"] = etag
 
-    return ResponseMulti[ProductPublic](result=_products_public)
+    return response
 
 
 @router.post("", status_code=status.HTTP_201_CREATED)
@@ -36,9 +63,28 @@ async def product_create(
     user: UserFlat = Depends(authentication.get_current_user),
 ) -> Response[ProductPublic]:
     """Create a new product."""
-    _product: ProductFlat = await ProductRepository().create(
+    _product: ProductFlat = await products.create(
         ProductUncommited(**schema.model_dump())
     )
     _product_public = ProductPublic.model_validate(_product)
 
     return Response[ProductPublic](result=_product_public)
+
+
+@router.post("/bulk", status_code=status.HTTP_201_CREATED)
+async def products_bulk_create(
+    request: Request,
+    schemas: list[ProductCreateRequestBody],
+    user: UserFlat = Depends(authentication.get_current_user),
+) -> ResponseMulti[ProductPublic]:
+    """Create many products within the single transaction.
+    Validation errors are reported for each item separately.
+    """
+
+    _products: list[ProductFlat] = await products.create_many(
+        [ProductUncommited(**schema.model_dump()) for schema in schemas]
+    )
+
+    return response_multi(
+        ProductPublic, _products, status_code=status.HTTP_201_CREATED
+    )
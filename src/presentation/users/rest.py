@@ -1,9 +1,16 @@
 import structlog
-from fastapi import APIRouter, Depends, Request, status
+from fastapi import APIRouter, Depends, Query, Request, status
 
 from src.application import authentication, users
 from src.domain.users import UserFlat
-from src.infrastructure.application import Response, ResponseMulti
+from src.infrastructure.application import (
+    NDJSONResponse,
+    Response,
+    ResponseMulti,
+    accepts_ndjson,
+    response_multi,
+)
+from src.infrastructure.database import CountMode
 
 from .contracts import UserPublic
 
@@ -13,14 +20,24 @@ router = APIRouter(prefix="/users", tags=["Users"])
 
 @router.get("", status_code=status.HTTP_200_OK)
 async def users_list(
-    request: Request, user: UserFlat = Depends(authentication.get_current_user)
+    request: Request,
+    cursor: str | None = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    count: CountMode | None = None,
+    user: UserFlat = Depends(authentication.get_current_user),
 ) -> ResponseMulti[UserPublic]:
-    """Get all users."""
+    """Get the page of users.
+    All users are streamed if the client accepts application/x-ndjson.
+    The total is counted on demand with the given mode, e.g. ?count=cached
+    """
 
-    _users: list[UserFlat] = await users.get_all()
-    # await logger.info("test")
-    _users_public: list[UserPublic] = [
-        UserPublic.model_validate(_user) for _user in _users
-    ]
+    if accepts_ndjson(request):
+        return NDJSONResponse(users.stream_all(), schema=UserPublic)
 
-    return ResponseMulti[UserPublic](result=_users_public)
+    total: int | None = await users.count(count) if count else None
+
+    _users, next_cursor = await users.get_page(cursor=cursor, limit=limit)
+
+    return response_multi(
+        UserPublic, _users, next_cursor=next_cursor, total=total
+    )
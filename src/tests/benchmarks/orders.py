@@ -0,0 +1,139 @@
+"""
+The micro-benchmark of orders pages of the user and of the product.
+
+It compares pages that are read by `OrdersRepository.for_user` and
+`OrdersRepository.for_product` with and without the composite indexes
+on (user_id, id) and (product_id, id). Pages start from the cursor in
+the middle of the table, so the seek after the cursor is measured too.
+The SQLite database is used, so the difference is the cost of the access
+path: the full scan of the table or the index range.
+
+Tables are created and dropped in the configured database, hence it
+refuses to run against anything but SQLite.
+
+Usage:
+    DATABASE__DRIVER=sqlite+aiosqlite DATABASE__NAME=benchmark.sqlite3 \\
+        python -m src.tests.benchmarks.orders
+"""
+
+import asyncio
+import random
+import time
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from src.domain.orders import OrdersRepository
+from src.infrastructure.application import settings
+from src.infrastructure.database import (
+    create_engine,
+    encode_cursor,
+    session_scope,
+)
+from src.infrastructure.database.tables import (
+    Base,
+    OrdersTable,
+    ProductsTable,
+    UsersTable,
+)
+
+SIZES = (1_000, 10_000, 100_000)
+USERS = 1_000
+PRODUCTS = 100
+NUMBER = 200
+LIMIT = 20
+
+
+async def _fill(connection: AsyncConnection, size: int) -> None:
+    await connection.run_sync(Base.metadata.create_all)
+    await connection.execute(
+        insert(UsersTable),
+        [
+            {"id": id_, "username": f"user{id_}", "password": ""}
+            for id_ in range(1, USERS + 1)
+        ],
+    )
+    await connection.execute(
+        insert(ProductsTable),
+        [
+            {"id": id_, "name": f"product{id_}", "price": 100}
+            for id_ in range(1, PRODUCTS + 1)
+        ],
+    )
+    await connection.execute(
+        insert(OrdersTable),
+        [
+            {
+                "amount": random.randint(1, 10),
+                "user_id": random.randint(1, USERS),
+                "product_id": random.randint(1, PRODUCTS),
+            }
+            for _ in range(size)
+        ],
+    )
+
+
+async def _measure(page) -> float:
+    """Return the best mean duration of the page in microseconds."""
+
+    await page()  # warm up the compiled cache
+    best = float("inf")
+
+    for _ in range(5):
+        started = time.perf_counter()
+
+        for _ in range(NUMBER):
+            await page()
+
+        best = min(best, time.perf_counter() - started)
+
+    return best / NUMBER * 1e6
+
+
+async def main() -> None:
+    if not settings.database.is_sqlite:
+        raise SystemExit("The benchmark runs only against SQLite")
+
+    engine = create_engine()
+
+    for size in SIZES:
+        async with engine.begin() as connection:
+            await _fill(connection, size)
+
+        # The cursor points to the middle of the table
+        cursor = encode_cursor("id", size // 2, size // 2)
+
+        async def for_user() -> None:
+            await OrdersRepository().for_user(
+                random.randint(1, USERS), cursor=cursor, limit=LIMIT
+            )
+
+        async def for_product() -> None:
+            await OrdersRepository().for_product(
+                random.randint(1, PRODUCTS), cursor=cursor, limit=LIMIT
+            )
+
+        for indexed in (True, False):
+            if not indexed:
+                async with engine.begin() as connection:
+                    for index in OrdersTable.__table__.indexes:
+                        await connection.run_sync(index.drop)
+
+            name = "indexed" if indexed else "scan"
+
+            async with session_scope():
+                for page in (for_user, for_product):
+                    microseconds = await _measure(page)
+                    print(
+                        f"{size:>8} rows {page.__name__:>12} {name:>8}: "
+                        f"{microseconds:.1f} us per page"
+                    )
+
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.drop_all)
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,53 @@
+"""
+The micro-benchmark of the primary key lookup.
+
+It compares building the select statement for each call with reusing
+the cached statement template with the bound parameter.
+The in-memory SQLite database is used, so the cost of the query itself
+is negligible and the difference is the cost of the statement.
+
+Usage: python -m src.tests.benchmarks.statements
+"""
+
+import timeit
+
+from sqlalchemy import bindparam, create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from src.infrastructure.database.services.statements import StatementCache
+from src.infrastructure.database.tables import Base, UsersTable
+
+NUMBER = 5000
+
+
+def main() -> None:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    cache = StatementCache()
+
+    with Session(engine) as session:
+        session.execute(insert(UsersTable).values(id=1, username="john"))
+
+        def built() -> None:
+            query = select(UsersTable).where(getattr(UsersTable, "id") == 1)
+            session.execute(query).scalars().one_or_none()
+
+        def cached() -> None:
+            query = cache.get(
+                (UsersTable, "get", "id"),
+                lambda: select(UsersTable).where(
+                    getattr(UsersTable, "id") == bindparam("value")
+                ),
+            )
+            session.execute(query, {"value": 1}).scalars().one_or_none()
+
+        for name, func in (("built", built), ("cached", cached)):
+            func()  # warm up the compiled cache
+            seconds = min(timeit.repeat(func, number=NUMBER, repeat=5))
+            print(f"{name:>8}: {seconds / NUMBER * 1e6:.1f} us per query")
+
+    print(f"   cache: {cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@ import structlog
 from alembic import command as alembic_command
 from alembic import config as _alembic_config
 
-from src.infrastructure.database import CTX_SESSION
+from src.infrastructure.database import session_scope
 
 logger = structlog.stdlib.get_logger()
 alembic_config = _alembic_config.Config("alembic.ini")
@@ -34,13 +34,12 @@ def auto_prune_database():
 
 @pytest.fixture(autouse=True)
 async def _auto_close_session():
-    """Autoclose each session after each test.
+    """Open the separate session for each test and autoclose it after.
     NOTE: we'd like to be sure that the session is closed in any case.
     """
 
-    yield
-    session = CTX_SESSION.get()
-    await session.close()
+    async with session_scope():
+        yield
 
 
 # =====================================================================
@@ -0,0 +1,34 @@
+from httpx import ASGITransport, AsyncClient
+
+from src.domain.products import ProductRepository, ProductUncommited
+from src.infrastructure.database import transaction
+from src.main2 import app
+
+
+async def test_products_list_pages_by_next_cursor():
+    async with transaction():
+        products = await ProductRepository().create_many(
+            [ProductUncommited(name=f"p{i}", price=1) for i in range(5)]
+        )
+
+    pages: list[list[int]] = []
+    params: dict[str, str | int] = {"limit": 2}
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        while True:
+            response = await client.get("/products", params=params)
+            assert response.status_code == 200
+
+            body = response.json()
+            pages.append([product["id"] for product in body["result"]])
+
+            if body["nextCursor"] is None:
+                break
+
+            params["cursor"] = body["nextCursor"]
+
+    ids = [product.id for product in products]
+
+    assert pages == [ids[:2], ids[2:4], ids[4:]]
@@ -0,0 +1,31 @@
+import pytest
+from sqlalchemy import event
+
+from src.infrastructure.database import create_engine
+from src.infrastructure.database import statements as statement_cache
+
+
+@pytest.fixture
+def statements():
+    """Collect SQL statements that are sent to the primary database."""
+
+    collected: list[str] = []
+    engine = create_engine().sync_engine
+
+    def collect(conn, cursor, statement, *_) -> None:
+        collected.append(statement)
+
+    event.listen(engine, "before_cursor_execute", collect)
+    yield collected
+    event.remove(engine, "before_cursor_execute", collect)
+
+
+@pytest.fixture(params=[True, False], ids=["returning", "no returning"])
+def update_returning(request, monkeypatch):
+    """Run the test with and without UPDATE .. RETURNING support."""
+
+    # NOTE: Templates depend on the dialect, so they are built again
+    monkeypatch.setattr(statement_cache, "_statements", {})
+    monkeypatch.setattr(
+        create_engine().dialect, "update_returning", request.param
+    )
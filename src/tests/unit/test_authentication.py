@@ -0,0 +1,40 @@
+from src.application import authentication
+from src.application.authentication import dependency_injection
+from src.domain.authentication import AuthenticationRepository
+from src.domain.users.tests import factories
+from src.infrastructure.database import create_engine, pool_metrics
+
+
+async def test_connection_is_not_held_while_password_is_verified(
+    monkeypatch,
+):
+    hashed = await authentication.hash_password("secret")
+    await factories.create_user(username="john", password=hashed)
+    checked_out: list[float] = []
+    verify = dependency_injection.verify_password
+
+    async def tracked(password: str, hashed_password: str):
+        checked_out.append(pool_metrics(create_engine())["checked_out"])
+        return await verify(password, hashed_password)
+
+    monkeypatch.setattr(dependency_injection, "verify_password", tracked)
+
+    user = await authentication.authenticate_user("john", "secret")
+
+    assert user and user.username == "john"
+    assert checked_out == [0]
+
+
+async def test_outdated_hash_is_updated_on_login(monkeypatch):
+    hashed = await authentication.hash_password("secret")
+    await factories.create_user(username="john", password=hashed)
+    monkeypatch.setattr(
+        dependency_injection.pwd_context,
+        "verify_and_update",
+        lambda password, hashed_password: (True, "new hash"),
+    )
+
+    await authentication.authenticate_user("john", "secret")
+    user = await AuthenticationRepository().get_user("john")
+
+    assert user.password == "new hash"
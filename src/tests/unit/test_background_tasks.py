@@ -0,0 +1,46 @@
+import asyncio
+
+from src.infrastructure.application import BackgroundTasks
+
+
+async def test_background_tasks_survive_failures_and_drain():
+    tasks = BackgroundTasks(max_concurrency=1)
+
+    async def succeed() -> None:
+        await asyncio.sleep(0)
+
+    async def fail() -> None:
+        raise RuntimeError
+
+    async def hang() -> None:
+        await asyncio.sleep(60)
+
+    tasks.spawn(fail)
+    tasks.spawn(succeed)
+    tasks.spawn(hang)
+    await tasks.drain(timeout=0.1)
+
+    assert tasks.metrics() == {
+        "running": 0,
+        "started": 3,
+        "succeeded": 1,
+        "failed": 1,
+        "cancelled": 1,
+    }
+
+
+async def test_unbounded_task_does_not_hold_the_slot():
+    tasks = BackgroundTasks(max_concurrency=1)
+
+    async def forever() -> None:
+        await asyncio.sleep(60)
+
+    async def succeed() -> None:
+        await asyncio.sleep(0)
+
+    tasks.spawn(forever, wait=False, bounded=False)
+    await asyncio.wait_for(tasks.spawn(succeed), timeout=1)
+    await tasks.drain(timeout=0.1)
+
+    assert tasks.metrics()["succeeded"] == 1
+    assert tasks.metrics()["cancelled"] == 1
@@ -0,0 +1,41 @@
+from src.domain.products import ProductRepository, ProductUncommited
+from src.infrastructure.database import create_engine, transaction
+
+
+async def test_products_are_inserted_in_one_statement_without_returning(
+    monkeypatch, statements
+):
+    # NOTE: MySQL does not support RETURNING for the executemany
+    monkeypatch.setattr(
+        create_engine().dialect, "insert_executemany_returning", False
+    )
+    schemas = [
+        ProductUncommited(name=f"product {i}", price=i) for i in range(3)
+    ]
+
+    async with transaction():
+        products = await ProductRepository().create_many(schemas)
+
+    inserts = [s for s in statements if s.startswith("INSERT")]
+    assert len(inserts) == 1
+    assert [(p.id, p.name) for p in products] == [
+        (1, "product 0"),
+        (2, "product 1"),
+        (3, "product 2"),
+    ]
+
+
+async def test_inserted_ids_do_not_overlap_existing_rows(monkeypatch):
+    monkeypatch.setattr(
+        create_engine().dialect, "insert_executemany_returning", False
+    )
+
+    async with transaction():
+        await ProductRepository().create_many(
+            [ProductUncommited(name="first", price=1)]
+        )
+        products = await ProductRepository().create_many(
+            [ProductUncommited(name="second", price=2)] * 2
+        )
+
+    assert [product.id for product in products] == [2, 3]
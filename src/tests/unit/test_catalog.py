@@ -0,0 +1,27 @@
+import asyncio
+
+from src.application.catalog import CatalogCache
+
+
+async def test_catalog_version_is_bumped_on_invalidation():
+    catalog = CatalogCache(maxsize=10, ttl=60)
+    version = await catalog.version()
+    await catalog.set(version, "page", ["product"])
+
+    await catalog.invalidate()
+
+    assert await catalog.version() != version
+    assert await catalog.get(await catalog.version(), "page") is None
+
+
+async def test_local_catalog_expires_without_invalidation():
+    catalog = CatalogCache(maxsize=10, ttl=0.05)
+    version = await catalog.version()
+    etag = await catalog.etag("page")
+    await catalog.set(version, "page", ["product"])
+
+    await asyncio.sleep(0.1)
+
+    assert await catalog.get(version, "page") is None
+    assert await catalog.version() != version
+    assert await catalog.etag("page") != etag
@@ -0,0 +1,54 @@
+import pytest
+
+from src.domain.users import UserRepository, UserUncommited
+from src.domain.users.tests import factories
+from src.infrastructure.database import CountMode, cached_count, transaction
+
+
+@pytest.fixture(autouse=True)
+def _clear_cached_counts():
+    cached_count.clear()
+
+
+async def test_cached_count_is_invalidated_on_save():
+    await factories.create_user()
+
+    cached_before = await UserRepository().count(CountMode.CACHED)
+    await factories.create_user()
+    cached_after = await UserRepository().count(CountMode.CACHED)
+
+    assert cached_before == 1
+    assert cached_after == 2
+
+
+async def test_cached_count_is_kept_until_commit():
+    await factories.create_user()
+    await UserRepository().count(CountMode.CACHED)
+
+    async with transaction():
+        await UserRepository().create(
+            UserUncommited(username="john", password="")
+        )
+        own_count = await UserRepository().count(CountMode.CACHED)
+        cached_before_commit = cached_count.get("users")
+
+    assert own_count == 2
+    assert cached_before_commit == 1
+    assert "users" not in cached_count
+
+
+async def test_cached_count_is_kept_on_rollback():
+    await factories.create_user()
+    await UserRepository().count(CountMode.CACHED)
+
+    try:
+        async with transaction():
+            await UserRepository().create(
+                UserUncommited(username="john", password="")
+            )
+            raise RuntimeError
+    except RuntimeError:
+        pass
+
+    assert cached_count.get("users") == 1
+    assert await UserRepository().count(CountMode.CACHED) == 1
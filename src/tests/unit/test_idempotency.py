@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from src.infrastructure.application import (
+    ConflictError,
+    Idempotency,
+    LocalIdempotencyStore,
+    UnprocessableError,
+)
+
+
+async def test_idempotency_coalesces_concurrent_duplicates():
+    idempotency = Idempotency(store=LocalIdempotencyStore(maxsize=10, ttl=60))
+    calls: list[int] = []
+
+    async def operation() -> bytes:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return b"created"
+
+    results = await asyncio.gather(
+        *(idempotency.perform("key", "payload", operation) for _ in range(3))
+    )
+    replay = await idempotency.perform("key", "payload", operation)
+
+    assert len(calls) == 1
+    assert sorted(replayed for _, replayed in results) == [False, True, True]
+    assert replay == (b"created", True)
+
+
+async def test_idempotency_rejects_key_reused_for_another_payload():
+    idempotency = Idempotency(store=LocalIdempotencyStore(maxsize=10, ttl=60))
+
+    async def operation() -> bytes:
+        return b"created"
+
+    await idempotency.perform("key", "payload", operation)
+
+    with pytest.raises(UnprocessableError):
+        await idempotency.perform("key", "another payload", operation)
+
+
+async def test_idempotency_conflicts_with_request_of_another_worker():
+    store = LocalIdempotencyStore(maxsize=10, ttl=60)
+    workers = Idempotency(store=store), Idempotency(store=store)
+    started, finish = asyncio.Event(), asyncio.Event()
+    calls: list[int] = []
+
+    async def operation() -> bytes:
+        calls.append(1)
+        started.set()
+        await finish.wait()
+        return b"created"
+
+    first = asyncio.create_task(
+        workers[0].perform("key", "payload", operation)
+    )
+    await started.wait()
+
+    with pytest.raises(ConflictError):
+        await workers[1].perform("key", "payload", operation)
+
+    finish.set()
+
+    assert await first == (b"created", False)
+    assert await workers[1].perform("key", "payload", operation) == (
+        b"created",
+        True,
+    )
+    assert len(calls) == 1
+
+
+async def test_idempotency_releases_key_of_failed_request():
+    store = LocalIdempotencyStore(maxsize=10, ttl=60)
+    workers = Idempotency(store=store), Idempotency(store=store)
+
+    async def failure() -> bytes:
+        raise RuntimeError
+
+    async def operation() -> bytes:
+        return b"created"
+
+    with pytest.raises(RuntimeError):
+        await workers[0].perform("key", "payload", failure)
+
+    assert await workers[1].perform("key", "payload", operation) == (
+        b"created",
+        False,
+    )
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from src.domain.orders import OrdersRepository, OrderUncommited
+from src.domain.products import ProductRepository, ProductUncommited
+from src.domain.users.tests import factories
+from src.infrastructure.database import UsersTable, get_loader, transaction
+
+
+async def test_loader_coalesces_lookups(statements):
+    for _ in range(2):
+        await factories.create_user()
+    statements.clear()
+
+    loader = get_loader(UsersTable)
+    users, user = await asyncio.gather(
+        loader.load_many([2, 1, 3]), loader.load(1)
+    )
+
+    assert [user.id if user else None for user in users] == [2, 1, None]
+    assert user is users[1]
+    assert len([s for s in statements if "FROM users" in s]) == 1
+
+
+async def test_loader_fails_waiters_and_retries_after_error(monkeypatch):
+    await factories.create_user()
+    loader = get_loader(UsersTable)
+
+    async def fail(*_, **__):
+        raise RuntimeError
+
+    with monkeypatch.context() as patch:
+        patch.setattr(loader, "execute", fail)
+
+        with pytest.raises(RuntimeError):
+            await asyncio.wait_for(loader.load_many([1, 2]), timeout=1)
+
+    # Failed ids are not cached, so they are loaded again
+    user = await asyncio.wait_for(loader.load(1), timeout=1)
+
+    assert user is not None and user.id == 1
+
+
+async def test_loader_cancelled_waiter_does_not_cancel_others():
+    await factories.create_user()
+    loader = get_loader(UsersTable)
+
+    cancelled = asyncio.ensure_future(loader.load(1))
+    waiter = asyncio.ensure_future(loader.load(1))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+
+    user = await asyncio.wait_for(waiter, timeout=1)
+
+    assert cancelled.cancelled()
+    assert user is not None and user.id == 1
+
+
+async def test_order_aggregates_load_only_requested_relations(statements):
+    user = await factories.create_user()
+
+    async with transaction():
+        [product] = await ProductRepository().create_many(
+            [ProductUncommited(name="product", price=1)]
+        )
+        order = await OrdersRepository().create(
+            OrderUncommited(amount=1, product_id=product.id, user_id=user.id)
+        )
+    statements.clear()
+
+    [aggregate] = await OrdersRepository().aggregates(
+        [order], include={"product"}
+    )
+
+    assert aggregate.product == product
+    assert aggregate.user is None
+    assert [s for s in statements if "FROM users" in s] == []
+    assert len([s for s in statements if "FROM products" in s]) == 1
@@ -0,0 +1,44 @@
+import structlog
+
+from src.infrastructure.application.logging import _CallsiteParameterAdder
+
+_PARAMETERS = {
+    structlog.processors.CallsiteParameter.FUNC_NAME,
+    structlog.processors.CallsiteParameter.LINENO,
+    structlog.processors.CallsiteParameter.MODULE,
+}
+
+
+def _logger(level: str) -> tuple[structlog.stdlib.BoundLogger, list]:
+    capture = structlog.testing.CapturingLogger()
+    logger = structlog.wrap_logger(
+        capture,
+        processors=[
+            structlog.stdlib.add_log_level,
+            _CallsiteParameterAdder(level=level, parameters=_PARAMETERS),
+            lambda _, __, event_dict: event_dict,
+        ],
+        wrapper_class=structlog.stdlib.BoundLogger,
+    )
+
+    return logger, capture.calls
+
+
+def test_callsite_points_to_logging_call():
+    logger, calls = _logger(level="WARNING")
+
+    logger.warning("event")
+    lineno = test_callsite_points_to_logging_call.__code__.co_firstlineno + 3
+
+    callsite = calls[0].kwargs
+    assert callsite["func_name"] == "test_callsite_points_to_logging_call"
+    assert callsite["module"] == "test_logging"
+    assert callsite["lineno"] == lineno
+
+
+def test_callsite_is_skipped_below_level():
+    logger, calls = _logger(level="WARNING")
+
+    logger.info("event")
+
+    assert "func_name" not in calls[0].kwargs
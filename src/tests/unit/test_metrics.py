@@ -0,0 +1,93 @@
+import json
+import os
+
+from src.infrastructure.application import MetricFamily, MetricsRegistry
+from src.infrastructure.application.metrics import (
+    _merge,
+    _read_snapshots,
+    _started_at,
+)
+
+# The worker that is gone, pids are never that large
+_DEAD = f"{2**30}-1.json"
+
+
+def _snapshot(requests: float, in_flight: float) -> list[MetricFamily]:
+    return [
+        MetricFamily(
+            "requests_total",
+            "counter",
+            "Requests",
+            [("", (("route", "/orders"),), requests)],
+        ),
+        MetricFamily(
+            "requests_in_flight", "gauge", "In flight", [("", (), in_flight)]
+        ),
+    ]
+
+
+def _values(families: list[MetricFamily]) -> dict[str, float]:
+    return {
+        family.name: sum(value for *_, value in family.samples)
+        for family in families
+    }
+
+
+def test_metrics_histogram_is_rendered_with_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram(
+        "duration_seconds", "Duration", labels=("route",), buckets=(0.1, 1)
+    )
+
+    histogram.observe(0.05, route="/orders")
+    histogram.observe(0.5, route="/orders")
+    histogram.observe(5, route="/orders")
+    rendered = registry.render()
+
+    assert 'duration_seconds_bucket{route="/orders",le="0.1"} 1.0' in rendered
+    assert 'duration_seconds_bucket{route="/orders",le="1.0"} 2.0' in rendered
+    assert 'duration_seconds_bucket{route="/orders",le="+Inf"} 3.0' in rendered
+    assert 'duration_seconds_count{route="/orders"} 3.0' in rendered
+
+
+def test_metrics_are_merged_by_the_family_mode():
+    families = [
+        MetricFamily("checkout_max", "gauge", "Max", [("", (), 1)], "max"),
+        MetricFamily("checkout_max", "gauge", "Max", [("", (), 3)], "max"),
+        *_snapshot(requests=2, in_flight=1),
+        *_snapshot(requests=3, in_flight=1),
+    ]
+
+    assert _values(_merge(families)) == {
+        "checkout_max": 3,
+        "requests_total": 5,
+        "requests_in_flight": 2,
+    }
+
+
+def test_gauges_of_workers_that_are_gone_are_skipped(tmp_path):
+    pid = os.getpid()
+    alive = tmp_path / f"{pid}-{_started_at(pid)}.json"
+    alive.write_text(json.dumps(_snapshot(requests=2, in_flight=1)))
+    (tmp_path / _DEAD).write_text(json.dumps(_snapshot(3, in_flight=5)))
+
+    assert _values(_merge(_read_snapshots(tmp_path))) == {
+        "requests_total": 5,
+        "requests_in_flight": 1,
+    }
+
+
+def test_snapshots_of_workers_that_are_gone_are_folded(tmp_path):
+    registry = MetricsRegistry(multiprocess_dir=tmp_path)
+    requests = registry.counter("requests_total", "Requests")
+    requests.inc(2)
+
+    for _ in range(2):
+        (tmp_path / _DEAD).write_text(json.dumps(_snapshot(3, in_flight=5)))
+        rendered = registry.render()
+
+    # Only files of the running worker and the aggregate are left
+    assert len(list(tmp_path.glob("*.json"))) == 2
+    assert "requests_total 2.0" in rendered
+    assert 'requests_total{route="/orders"} 6.0' in rendered
+    assert "requests_in_flight" not in rendered
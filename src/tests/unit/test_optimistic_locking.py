@@ -0,0 +1,89 @@
+import pytest
+
+from src.domain.products import ProductRepository, ProductUncommited
+from src.infrastructure.application import ConflictError, NotFoundError
+from src.infrastructure.database import transaction
+
+
+async def _create_product() -> int:
+    async with transaction():
+        product = await ProductRepository().create(
+            ProductUncommited(name="product", price=100)
+        )
+
+    return product.id
+
+
+async def test_update_increments_version(update_returning):
+    id = await _create_product()
+
+    async with transaction():
+        product = await ProductRepository().update(
+            id, {"price": 200, "version": 1}
+        )
+
+    assert (product.price, product.version) == (200, 2)
+
+
+async def test_update_of_stale_version_is_conflict(update_returning):
+    id = await _create_product()
+
+    async with transaction():
+        await ProductRepository().update(id, {"price": 200, "version": 1})
+
+    with pytest.raises(ConflictError):
+        async with transaction():
+            await ProductRepository().update(id, {"price": 300, "version": 1})
+
+    async with transaction():
+        product = await ProductRepository().get(id)
+
+    assert (product.price, product.version) == (200, 2)
+
+
+async def test_update_of_missing_row_is_not_found(update_returning):
+    with pytest.raises(NotFoundError):
+        async with transaction():
+            await ProductRepository().update(1, {"price": 300, "version": 1})
+
+
+async def test_update_by_updated_key_returns_row(update_returning):
+    await _create_product()
+
+    async with transaction():
+        product = await ProductRepository()._update(
+            key="name", value="product", payload={"name": "renamed"}
+        )
+
+    assert product.name == "renamed"
+
+
+async def test_update_many_conflict_rolls_back_all_rows():
+    first, second = await _create_product(), await _create_product()
+
+    async with transaction():
+        await ProductRepository().update(second, {"price": 1, "version": 1})
+
+    with pytest.raises(ConflictError):
+        async with transaction():
+            await ProductRepository().update_many(
+                [
+                    (first, {"price": 2, "version": 1}),
+                    (second, {"price": 2, "version": 1}),
+                ]
+            )
+
+    async with transaction():
+        products = [p.price async for p in ProductRepository().all()]
+
+    assert products == [100, 1]
+
+
+async def test_update_many_of_missing_row_is_not_found():
+    id = await _create_product()
+
+    with pytest.raises(NotFoundError):
+        async with transaction():
+            await ProductRepository().update_many(
+                [(id, {"price": 2, "version": 1}), (id + 1, {"version": 1})]
+            )
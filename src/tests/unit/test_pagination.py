@@ -0,0 +1,67 @@
+import pytest
+
+from src.domain.orders import OrdersRepository, OrderUncommited
+from src.domain.products import ProductRepository, ProductUncommited
+from src.domain.users import UserRepository
+from src.domain.users.tests import factories
+from src.infrastructure.application import BadRequestError
+from src.infrastructure.database import encode_cursor, transaction
+
+
+async def test_users_page_follows_cursor():
+    for _ in range(3):
+        await factories.create_user()
+
+    first_page, cursor = await UserRepository().page(limit=2)
+    second_page, last_cursor = await UserRepository().page(
+        cursor=cursor, limit=2
+    )
+
+    assert [user.id for user in first_page] == [1, 2]
+    assert [user.id for user in second_page] == [3]
+    assert last_cursor is None
+
+
+async def test_users_page_invalid_cursor():
+    with pytest.raises(BadRequestError):
+        await UserRepository().page(cursor="invalid")
+
+
+async def test_orders_of_user_and_product_follow_cursor():
+    users = [await factories.create_user() for _ in range(2)]
+
+    async with transaction():
+        products = await ProductRepository().create_many(
+            [ProductUncommited(name=f"p{i}", price=1) for i in range(2)]
+        )
+        # Orders of users and products are interleaved
+        orders = await OrdersRepository().create_many(
+            [
+                OrderUncommited(
+                    amount=1,
+                    user_id=users[i % 2].id,
+                    product_id=products[i // 3 % 2].id,
+                )
+                for i in range(6)
+            ]
+        )
+
+    pages: list[list[int]] = []
+    cursor: str | None = None
+
+    while True:
+        page, cursor = await OrdersRepository().for_user(
+            users[0].id, cursor=cursor, limit=2
+        )
+        pages.append([order.id for order in page])
+
+        if cursor is None:
+            break
+
+    by_product, cursor = await OrdersRepository().for_product(
+        products[1].id, cursor=encode_cursor("id", None, orders[3].id)
+    )
+
+    assert pages == [[orders[0].id, orders[2].id], [orders[4].id]]
+    assert [order.id for order in by_product] == [orders[4].id, orders[5].id]
+    assert cursor is None
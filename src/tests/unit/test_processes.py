@@ -0,0 +1,167 @@
+import asyncio
+import os
+import time
+from multiprocessing import Pipe
+
+import pytest
+
+from src.infrastructure.application import metrics, processes, settings
+from src.infrastructure.application.processes import RestartPolicy
+
+
+class _Process:
+    def __init__(self) -> None:
+        self.pid: int = os.getpid()
+        self.exitcode: int | None = None
+        self.terminated: bool = False
+        self.kills: int = 0
+
+    def terminate(self) -> None:
+        self.terminated = True
+
+    def kill(self) -> None:
+        self.kills += 1
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture(autouse=True)
+def backoff(monkeypatch):
+    monkeypatch.setattr(settings.processes, "backoff_base", 1)
+    monkeypatch.setattr(settings.processes, "backoff_max", 8)
+    monkeypatch.setattr(settings.processes, "heartbeat_timeout", 30)
+    monkeypatch.setattr(settings.processes, "shutdown_timeout", 10)
+
+
+def _child(restart: RestartPolicy) -> processes._ChildProcess:
+    child = processes._ChildProcess(
+        key="test", callback=print, kwargs={}, restart=restart
+    )
+
+    def start() -> None:
+        child.process = _Process()  # type: ignore[assignment]
+        child.started_at = child.last_heartbeat = 0.0
+        child.restart_at = None
+
+    child.start = start  # type: ignore[method-assign]
+    child.start()
+
+    return child
+
+
+def test_backoff_is_doubled_up_to_the_max():
+    assert [processes._backoff(failures) for failures in range(5)] == [
+        1,
+        2,
+        4,
+        8,
+        8,
+    ]
+
+
+@pytest.mark.parametrize(
+    "restart, exitcode, restarted",
+    [
+        (RestartPolicy.NEVER, 1, False),
+        (RestartPolicy.ON_FAILURE, 0, False),
+        (RestartPolicy.ON_FAILURE, 1, True),
+        (RestartPolicy.ALWAYS, 0, True),
+    ],
+)
+def test_supervisor_follows_restart_policy(restart, exitcode, restarted):
+    child = _child(restart)
+    child.process.exitcode = exitcode  # type: ignore[union-attr]
+
+    processes._check(child, now=1)
+
+    assert child.finished is not restarted
+    assert (child.restart_at is not None) is restarted
+
+
+def test_supervisor_restarts_after_backoff():
+    child = _child(RestartPolicy.ALWAYS)
+    delays: list[float] = []
+
+    for now in (1.0, 2.0, 3.0):
+        child.process.exitcode = 1  # type: ignore[union-attr]
+        processes._check(child, now)
+        delays.append(child.restart_at - now)  # type: ignore[operator]
+
+        # Nothing happens until the delay is elapsed
+        processes._check(child, child.restart_at - 0.1)  # type: ignore
+        assert child.process.exitcode == 1  # type: ignore[union-attr]
+
+        processes._check(child, child.restart_at)  # type: ignore[arg-type]
+        assert child.process.exitcode is None  # type: ignore[union-attr]
+
+    assert delays == [1, 2, 4]
+    assert child.restarts == 3
+
+
+def test_supervisor_resets_backoff_of_recovered_child():
+    child = _child(RestartPolicy.ALWAYS)
+    child.failures = 3
+    child.process.exitcode = 1  # type: ignore[union-attr]
+
+    # The child ran longer than the max backoff
+    processes._check(child, now=10)
+
+    assert child.restart_at == 11
+    assert child.failures == 1
+
+
+def test_supervisor_terminates_child_without_heartbeats():
+    child = _child(RestartPolicy.ALWAYS)
+
+    processes._check(child, now=29)
+    assert not child.process.terminated  # type: ignore[union-attr]
+
+    processes._check(child, now=31)
+    assert child.process.terminated  # type: ignore[union-attr]
+
+
+def test_supervisor_kills_child_that_ignores_terminate():
+    child = _child(RestartPolicy.ALWAYS)
+
+    processes._check(child, now=31)
+    processes._check(child, now=40)
+    assert child.process.kills == 0  # type: ignore[union-attr]
+
+    processes._check(child, now=41)
+    processes._check(child, now=42)
+    assert child.process.kills == 1  # type: ignore[union-attr]
+
+
+def test_process_stats_are_exposed_as_metrics(monkeypatch):
+    child = _child(RestartPolicy.ALWAYS)
+    child.restarts = 2
+    monkeypatch.setitem(processes._PROCESSES, child.key, child)
+
+    rendered = metrics.render()
+
+    assert 'background_process_up{process="test"} 1.0' in rendered
+    assert 'background_process_restarts_total{process="test"} 2.0' in rendered
+    assert 'background_process_resident_memory_bytes{process="test"}' in (
+        rendered
+    )
+
+
+async def test_hung_coroutine_stops_heartbeats(monkeypatch):
+    monkeypatch.setattr(settings.processes, "heartbeat_interval", 0.01)
+    receiver, sender = Pipe(duplex=False)
+
+    async def job() -> None:
+        await asyncio.sleep(0.05)
+        # The job blocks the event loop
+        time.sleep(0.2)
+
+    await processes._run_with_heartbeats(sender, job, {})
+
+    beats = 0
+    while receiver.poll():
+        receiver.recv_bytes()
+        beats += 1
+
+    # NOTE: Heartbeats are sent only while the job awaits
+    assert 1 < beats < 10
@@ -0,0 +1,137 @@
+import asyncio
+
+import pytest
+from sqlalchemy.engine import IteratorResult
+from sqlalchemy.engine.result import SimpleResultMetaData
+
+from src.domain.users import UserFlat, UserRepository
+from src.domain.users.tests import factories
+from src.infrastructure.application import (
+    AuthorizationError,
+    background_tasks,
+    settings,
+)
+from src.infrastructure.database.services import profiling
+from src.infrastructure.database.services import session as session_module
+from src.presentation.admin.rest import queries_top
+
+
+def _profiler(**kwargs) -> profiling.QueryProfiler:
+    return profiling.QueryProfiler(
+        **{
+            "enabled": True,
+            "slow_threshold": 1,
+            "explain": False,
+            "window": 60,
+            "max_fingerprints": 100,
+            **kwargs,
+        }
+    )
+
+
+def _result(rows: int) -> IteratorResult:
+    return IteratorResult(
+        SimpleResultMetaData(["id"]), iter([(id_,) for id_ in range(rows)])
+    )
+
+
+def test_fingerprint_ignores_literals_and_whitespace():
+    queries = (
+        "SELECT * FROM users WHERE id = 1 AND name = 'john''s'",
+        "SELECT *  FROM users\n WHERE id = 22 AND name = 'jane'",
+    )
+
+    assert {profiling._normalize(query) for query in queries} == {
+        "SELECT * FROM users WHERE id = ? AND name = ?"
+    }
+    assert profiling._normalize("SELECT 1 WHERE id IN (1, 2, 3)") == (
+        "SELECT ? WHERE id IN (...)"
+    )
+
+
+async def test_top_covers_the_current_and_the_previous_window():
+    profiler = _profiler()
+
+    result = await profiler.record("SELECT * FROM users", None, _result(2), 1)
+    assert len(result.all()) == 2
+
+    profiler._rotated_at -= profiler.window
+    await profiler.record("SELECT * FROM orders", None, _result(1), 2)
+
+    assert [item["sql"] for item in profiler.top()] == [
+        "SELECT * FROM orders",
+        "SELECT * FROM users",
+    ]
+
+    profiler._rotated_at -= profiler.window
+
+    assert [
+        (item["sql"], item["rows"]) for item in profiler.top()
+    ] == [("SELECT * FROM orders", 1)]
+
+
+async def test_query_is_attributed_to_the_caller():
+    profiler = _profiler()
+
+    await profiler.record("SELECT 1", None, _result(0), 0.1)
+
+    assert profiler.top()[0]["origin"] == (
+        f"{__name__}:test_query_is_attributed_to_the_caller"
+    )
+
+
+async def test_slow_query_is_explained_in_the_background(monkeypatch):
+    profiler = _profiler(explain=True)
+    explained = asyncio.Event()
+
+    async def explain(query, params) -> list[str]:
+        await explained.wait()
+        return ["SCAN users"]
+
+    monkeypatch.setattr(profiling, "_explain", explain)
+    plans: list[list[str] | None] = []
+    monkeypatch.setattr(
+        profiler,
+        "_log_slow",
+        lambda fingerprint, stats, seconds, plan=None: plans.append(plan),
+    )
+
+    # The query is not delayed by EXPLAIN
+    await asyncio.wait_for(
+        profiler.record("SELECT 1", None, _result(0), 2), timeout=1
+    )
+    assert plans == []
+
+    explained.set()
+    await background_tasks.drain(timeout=1)
+
+    assert plans == [["SCAN users"]]
+
+
+async def test_queries_are_available_only_for_admins(monkeypatch):
+    monkeypatch.setattr(settings.database.profiling, "admins", ["admin"])
+
+    with pytest.raises(AuthorizationError):
+        await queries_top(
+            limit=20, user=UserFlat(id=1, username="john", password="")
+        )
+
+    response = await queries_top(
+        limit=20, user=UserFlat(id=1, username="admin", password="")
+    )
+
+    assert response.status_code == 200
+
+
+async def test_streamed_query_is_recorded_once_iterated(monkeypatch):
+    profiler = _profiler()
+    monkeypatch.setattr(session_module, "query_profiler", profiler)
+
+    for _ in range(3):
+        await factories.create_user()
+
+    users = [user.id async for user in UserRepository().all()]
+    [item] = [item for item in profiler.top() if "FROM users" in item["sql"]]
+
+    assert users == [1, 2, 3]
+    assert (item["calls"], item["rows"]) == (1, 3)
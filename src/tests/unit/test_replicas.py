@@ -0,0 +1,80 @@
+import pytest
+from sqlalchemy import insert
+
+from src.domain.users import UserRepository, UserUncommited
+from src.domain.users.tests import factories
+from src.infrastructure.database import (
+    Base,
+    CountMode,
+    ReplicaSet,
+    UsersTable,
+    create_engine,
+    session_scope,
+    transaction,
+)
+from src.infrastructure.database.services import session
+
+
+@pytest.fixture
+async def replica(tmp_path, monkeypatch):
+    """The replica that lags behind the primary database."""
+
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path}/replica.sqlite3")
+
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+        await connection.execute(
+            insert(UsersTable),
+            [
+                {"username": "replica 1", "password": ""},
+                {"username": "replica 2", "password": ""},
+            ],
+        )
+
+    replicas = ReplicaSet(engines=[engine], ejection=60)
+    monkeypatch.setattr(session, "get_replicas", lambda: replicas)
+    yield engine
+    await engine.dispose()
+
+
+async def _usernames() -> list[str]:
+    users, _ = await UserRepository().page()
+    return [user.username for user in users]
+
+
+async def test_reads_stay_on_replica_after_count(replica):
+    await factories.create_user(username="primary")
+
+    async with session_scope():
+        count = await UserRepository().count(CountMode.EXACT)
+        usernames = await _usernames()
+
+    assert count == 2
+    assert usernames == ["replica 1", "replica 2"]
+
+
+async def test_reads_are_routed_to_primary_after_write(replica):
+    await factories.create_user(username="primary")
+
+    async with session_scope():
+        before = await _usernames()
+
+        async with transaction():
+            await UserRepository().create(
+                UserUncommited(username="created", password="")
+            )
+
+        after = await _usernames()
+
+    assert before == ["replica 1", "replica 2"]
+    assert after == ["primary", "created"]
+
+
+async def test_failed_replica_is_not_reused_by_session(replica):
+    async with session_scope() as current:
+        await _usernames()
+        UserRepository()._eject_replica()
+        usernames = await _usernames()
+
+    assert "replica" not in current.info
+    assert usernames == []
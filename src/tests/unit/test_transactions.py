@@ -0,0 +1,60 @@
+from src.domain.users import UserRepository
+from src.domain.users.tests import factories
+from src.infrastructure.database import (
+    create_engine,
+    pool_metrics,
+    transaction,
+    transaction_metrics,
+)
+
+
+def _count(operation: str) -> int:
+    return transaction_metrics().get(operation, {}).get("count", 0)
+
+
+async def test_transaction_commits_writes():
+    commits = _count("commit")
+
+    await factories.create_user()
+
+    assert _count("commit") == commits + 1
+
+
+async def test_read_only_transaction_is_not_committed():
+    await factories.create_user()
+    commits, closes = _count("commit"), _count("close")
+
+    async with transaction():
+        await UserRepository().count()
+
+    assert _count("commit") == commits
+    assert _count("close") == closes + 1
+
+
+async def test_read_only_transaction_releases_connection():
+    await factories.create_user()
+
+    async with transaction():
+        user = await UserRepository().get(id=1)
+        checked_out = pool_metrics(create_engine())["checked_out"]
+
+    assert checked_out == 1
+    assert pool_metrics(create_engine())["checked_out"] == 0
+    assert user.id == 1
+
+
+async def test_nested_transaction_rolls_back_only_savepoint():
+    async with transaction():
+        await factories.create_user(username="kept")
+
+        try:
+            async with transaction():
+                await factories.create_user(username="dropped")
+                raise RuntimeError
+        except RuntimeError:
+            pass
+
+    async with transaction():
+        users = [user.username async for user in UserRepository().all()]
+
+    assert users == ["kept"]
@@ -0,0 +1,17 @@
+from src.domain.users import UserRepository
+from src.domain.users.tests import factories
+from src.infrastructure.database import transaction
+
+
+async def test_updated_row_is_read_back_within_session(update_returning):
+    user = await factories.create_user(username="john", password="secret")
+
+    async with transaction():
+        # The object is kept in the identity map of the session
+        instance = await UserRepository()._get("id", user.id)
+        updated = await UserRepository().update(user.id, {"username": "jane"})
+        fetched = await UserRepository().get(user.id)
+
+    assert (instance.username, instance.password) == ("jane", "secret")
+    assert (updated.username, updated.password) == ("jane", "secret")
+    assert (fetched.username, fetched.password) == ("jane", "secret")
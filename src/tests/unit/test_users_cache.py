@@ -0,0 +1,95 @@
+import time
+
+from src.application import users
+from src.application.authentication import (
+    create_access_token,
+    get_current_user,
+    invalidate_user,
+)
+from src.application.authentication import cache as cache_module
+from src.application.authentication.cache import (
+    LocalUsersCache,
+    RedisUsersCache,
+    _dump,
+)
+from src.domain.users import UserFlat
+from src.domain.users.tests import factories
+
+
+async def test_users_cache_invalidates_all_tokens_of_user():
+    cache = LocalUsersCache(maxsize=10, ttl=60)
+    user = UserFlat(id=1, username="john", password="secret")
+    await cache.set("1", 100, user)
+    await cache.set("1", 200, user)
+
+    cached = await cache.get("1", 100)
+    await cache.invalidate("1")
+
+    assert cached == user
+    assert await cache.get("1", 100) is None
+    assert await cache.get("1", 200) is None
+
+
+async def test_current_user_is_fetched_again_once_updated():
+    user = await factories.create_user(username="john")
+    token = create_access_token({"sub": str(user.id)}, options={})
+    await invalidate_user(user.id)
+
+    await get_current_user(token)
+    await users.update(user.id, {"username": "jane"})
+    current = await get_current_user(token)
+
+    assert current.username == "jane"
+
+
+async def test_password_hash_is_not_cached():
+    user = await factories.create_user(password="hash")
+    token = create_access_token({"sub": str(user.id)}, options={})
+    await invalidate_user(user.id)
+
+    fetched = await get_current_user(token)
+    cached = await get_current_user(token)
+
+    assert fetched.password == cached.password == ""
+    assert "hash" not in _dump(user)
+
+
+class _Redis:
+    """Commands of Redis that are used by the users cache."""
+
+    def __init__(self) -> None:
+        self.values: dict[str, bytes] = {}
+
+    async def get(self, key: str) -> bytes | None:
+        return self.values.get(key)
+
+    async def set(self, key: str, value: str, ex: int) -> None:
+        self.values[key] = value.encode()
+
+    async def incr(self, key: str) -> int:
+        self.values[key] = b"%d" % (int(self.values.get(key, 0)) + 1)
+        return int(self.values[key])
+
+    async def expire(self, key: str, seconds: int) -> None:
+        pass
+
+
+async def test_redis_users_cache_invalidates_by_generation(monkeypatch):
+    redis = _Redis()
+    monkeypatch.setattr(cache_module, "create_redis", lambda url: redis)
+    cache = RedisUsersCache(url="redis://", ttl=60)
+    user = UserFlat(id=1, username="john", password="")
+    exp = int(time.time()) + 60
+
+    await cache.set("1", exp, user)
+    await cache.set("2", exp, user)
+    cached = await cache.get("1", exp)
+    await cache.invalidate("1")
+
+    assert cached == user
+    assert await cache.get("1", exp) is None
+    assert await cache.get("2", exp) == user
+
+    await cache.set("1", exp, user)
+
+    assert await cache.get("1", exp) == user